@@ -12,6 +12,9 @@ from app.db.base import Base
 # Import all models
 from app.models.transaction import Transaction
 from app.models.alert import Alert
+from app.models.shadow_score import ShadowScore
+from app.models.label import TransactionLabel, ModelTrainingRun
+from app.models.account_profile import AccountProfile
 
 config = context.config
 
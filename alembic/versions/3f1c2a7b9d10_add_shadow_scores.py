@@ -0,0 +1,47 @@
+"""Add shadow_scores
+
+Revision ID: 3f1c2a7b9d10
+Revises: 6153d42f27d7
+Create Date: 2026-10-19 10:12:41.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7b9d10'
+down_revision: Union[str, Sequence[str], None] = '6153d42f27d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'shadow_scores',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('transaction_id', sa.String(), nullable=True),
+        sa.Column('model_name', sa.String(), nullable=True),
+        sa.Column('is_champion', sa.Boolean(), nullable=True),
+        sa.Column('is_anomaly', sa.Boolean(), nullable=True),
+        sa.Column('champion_anomaly', sa.Boolean(), nullable=True),
+        sa.Column('latency_ms', sa.Float(), nullable=True),
+        sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_shadow_scores_id'), 'shadow_scores', ['id'], unique=False)
+    op.create_index(op.f('ix_shadow_scores_model_name'), 'shadow_scores', ['model_name'], unique=False)
+    op.create_index(op.f('ix_shadow_scores_timestamp'), 'shadow_scores', ['timestamp'], unique=False)
+    op.create_index(op.f('ix_shadow_scores_transaction_id'), 'shadow_scores', ['transaction_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_shadow_scores_transaction_id'), table_name='shadow_scores')
+    op.drop_index(op.f('ix_shadow_scores_timestamp'), table_name='shadow_scores')
+    op.drop_index(op.f('ix_shadow_scores_model_name'), table_name='shadow_scores')
+    op.drop_index(op.f('ix_shadow_scores_id'), table_name='shadow_scores')
+    op.drop_table('shadow_scores')
@@ -0,0 +1,32 @@
+"""Add partial index on new alerts
+
+Revision ID: 8a4e5d21c6f3
+Revises: 3f1c2a7b9d10
+Create Date: 2026-10-19 11:02:17.530114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4e5d21c6f3'
+down_revision: Union[str, Sequence[str], None] = '3f1c2a7b9d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_alerts_status_new', 'alerts', ['id'], unique=False,
+        sqlite_where=sa.text("status = 'new'"),
+        postgresql_where=sa.text("status = 'new'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_alerts_status_new', table_name='alerts')
@@ -0,0 +1,52 @@
+"""Add transaction_labels and model_training_runs
+
+Revision ID: c27d9e4f0a15
+Revises: 8a4e5d21c6f3
+Create Date: 2026-10-19 12:40:05.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c27d9e4f0a15'
+down_revision: Union[str, Sequence[str], None] = '8a4e5d21c6f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'transaction_labels',
+        sa.Column('transaction_id', sa.String(), nullable=False),
+        sa.Column('is_fraud', sa.Boolean(), nullable=False),
+        sa.Column('labeled_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('transaction_id')
+    )
+    op.create_index(op.f('ix_transaction_labels_labeled_at'), 'transaction_labels', ['labeled_at'], unique=False)
+    op.create_table(
+        'model_training_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('model_file', sa.String(), nullable=True),
+        sa.Column('transaction_watermark', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('label_watermark', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('new_transactions', sa.Integer(), nullable=True),
+        sa.Column('new_labels', sa.Integer(), nullable=True),
+        sa.Column('sample_size', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_model_training_runs_id'), 'model_training_runs', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_model_training_runs_id'), table_name='model_training_runs')
+    op.drop_table('model_training_runs')
+    op.drop_index(op.f('ix_transaction_labels_labeled_at'), table_name='transaction_labels')
+    op.drop_table('transaction_labels')
@@ -0,0 +1,40 @@
+"""Add account_profiles
+
+Revision ID: e5b8f1a3d742
+Revises: c27d9e4f0a15
+Create Date: 2026-10-19 14:21:50.671904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b8f1a3d742'
+down_revision: Union[str, Sequence[str], None] = 'c27d9e4f0a15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'account_profiles',
+        sa.Column('account_id', sa.String(), nullable=False),
+        sa.Column('txn_count', sa.Integer(), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('total_amount_sq', sa.Float(), nullable=False),
+        sa.Column('flagged_count', sa.Integer(), nullable=False),
+        sa.Column('last_lat', sa.Float(), nullable=True),
+        sa.Column('last_lon', sa.Float(), nullable=True),
+        sa.Column('last_seen', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('recent_timestamps', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('account_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('account_profiles')
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from app.db.session import get_db
+from app.schemas.account import AccountProfileResponse, AccountWindowStats
+from app.services.account_profiles import profiles
+from app.services.txn_window import txn_window
+
+router = APIRouter()
+
+@router.get("/{account_id}/profile", response_model=AccountProfileResponse)
+def get_account_profile(account_id: str, db: Session = Depends(get_db)):
+    # Same cached profile the fraud detector scores with
+    profile = profiles.get(db, account_id)
+    if not profile.txn_count:
+        raise HTTPException(status_code=404, detail="Account not found")
+
+    now = datetime.utcnow()
+    return AccountProfileResponse(
+        account_id=profile.account_id,
+        txn_count=profile.txn_count,
+        total_amount=round(profile.total_amount, 2),
+        avg_amount=round(profile.avg_amount, 2),
+        std_amount=round(profile.std_amount, 2),
+        flagged_count=profile.flagged_count,
+        last_lat=profile.last_lat,
+        last_lon=profile.last_lon,
+        last_seen=profile.last_seen,
+        velocity_5m=profile.velocity(now),
+        recent_amount_5m=round(profile.recent_amount(now), 2),
+    )
+
+@router.get("/{account_id}/window", response_model=AccountWindowStats)
+def get_account_window(account_id: str, minutes: int = Query(60, ge=1, le=24 * 60)):
+    # Served from the in-memory transaction window, no database query
+    if not txn_window.enabled:
+        raise HTTPException(status_code=503, detail="Transaction window is disabled (TXN_WINDOW_CAPACITY=0)")
+
+    stats = txn_window.stats([account_id], datetime.utcnow(), timedelta(minutes=minutes))[account_id]
+    return AccountWindowStats(
+        account_id=account_id,
+        minutes=minutes,
+        count=stats.count,
+        total_amount=round(stats.total, 2),
+        avg_amount=round(stats.mean, 2),
+        std_amount=round(stats.std, 2),
+    )
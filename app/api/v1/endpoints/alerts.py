@@ -2,17 +2,47 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.models.alert import Alert
-from app.schemas.alert import AlertResponse
+from app.schemas.alert import AlertResponse, AlertFilter, AlertStatus, AlertBulkStatusUpdate, AlertBulkStatusResult
+from app.services.alert_triage import bulk_update_status, alert_filter_conditions
+from app.services.exporter import export_response
+from sqlalchemy import select
+from datetime import datetime
+from typing import Literal, Optional
+from app.core.responses import FastJSONResponse
 
 router = APIRouter()
 
+ALERT_COLUMNS = [
+    Alert.id, Alert.transaction_id, Alert.rule_triggered, Alert.severity,
+    Alert.details, Alert.timestamp, Alert.status,
+]
+
 @router.get("/", response_model=list[AlertResponse])
 def get_alerts(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    alerts = db.query(Alert).order_by(Alert.id.desc()).offset(skip).limit(limit).all()
-    return alerts
+    alerts = db.query(*ALERT_COLUMNS).order_by(Alert.id.desc()).offset(skip).limit(limit).all()
+    return FastJSONResponse([row._asdict() for row in alerts])
 
 @router.post("/mark-read")
 def mark_alerts_read(db: Session = Depends(get_db)):
-    db.query(Alert).filter(Alert.status == 'new').update({Alert.status: 'read'}, synchronize_session=False)
-    db.commit()
-    return {"status": "success", "message": "All alerts marked as read"}
+    updated = bulk_update_status(db, AlertFilter(status="new"), "read")
+    return {"status": "success", "message": "All alerts marked as read", "updated": updated}
+
+@router.post("/bulk-status", response_model=AlertBulkStatusResult)
+def bulk_update_alert_status(update: AlertBulkStatusUpdate, db: Session = Depends(get_db)):
+    updated = bulk_update_status(db, update, update.new_status)
+    return AlertBulkStatusResult(status="success", new_status=update.new_status, updated=updated)
+
+@router.get("/export")
+def export_alerts(
+    format: Literal["csv", "ndjson", "parquet"] = "csv",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    account_id: Optional[str] = None,
+    severity: Optional[str] = None,
+    rule: Optional[str] = None,
+    status: Optional[AlertStatus] = None,
+    db: Session = Depends(get_db)
+):
+    criteria = AlertFilter(since=since, until=until, account_id=account_id, severity=severity, rule=rule, status=status)
+    stmt = select(*ALERT_COLUMNS).where(*alert_filter_conditions(criteria)).order_by(Alert.id)
+    return export_response(db, stmt, ALERT_COLUMNS, format, "alerts")
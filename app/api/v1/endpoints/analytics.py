@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, text, or_
 from app.db.session import get_db
 from app.models.alert import Alert
-from app.schemas.analytics import AnomalyStats, TimeSeriesPoint
+from app.schemas.analytics import AnomalyStats, TimeSeriesPoint, TopRiskAccounts, AccountFlaggedVolume, LocationCellStats
+from app.services.sketches import stream_sketches
 from typing import List
 from datetime import datetime, timedelta
 
@@ -188,3 +189,33 @@ def get_geographic_distribution(db: Session = Depends(get_db)):
         GeoStat(country="Brazil", count=int(fraud_count * 0.15) + 1, risk_level="medium"),
         GeoStat(country="USA", count=int(fraud_count * 0.1), risk_level="low"),
     ]
+
+@router.get("/top-risk-accounts", response_model=TopRiskAccounts)
+def get_top_risk_accounts(limit: int = Query(10, ge=1, le=100)):
+    # Served from the heavy-hitter sketch of the current window, no database query
+    return stream_sketches.top_risk_accounts(datetime.utcnow(), limit)
+
+@router.get("/accounts/{account_id}/flagged-volume", response_model=AccountFlaggedVolume)
+def get_account_flagged_volume(account_id: str):
+    # Count-Min estimate for any account, not just the top k
+    now = datetime.utcnow()
+    volume, error = stream_sketches.flagged_volume(account_id, now)
+    return AccountFlaggedVolume(
+        account_id=account_id,
+        window_start=stream_sketches.window_start(now),
+        window_minutes=stream_sketches.window_minutes,
+        flagged_volume=volume,
+        max_overestimate=error,
+    )
+
+@router.get("/location-cell", response_model=LocationCellStats)
+def get_location_cell(lat: float = Query(..., ge=-90, le=90), lon: float = Query(..., ge=-180, le=180)):
+    # Distinct accounts seen in the ~11 km cell this window, from its HyperLogLog
+    now = datetime.utcnow()
+    return LocationCellStats(
+        cell=stream_sketches.location_cell(lat, lon),
+        window_start=stream_sketches.window_start(now),
+        window_minutes=stream_sketches.window_minutes,
+        distinct_accounts=stream_sketches.distinct_accounts_in_cell(lat, lon, now),
+        relative_error=stream_sketches.relative_error,
+    )
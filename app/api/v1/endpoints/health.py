@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+router = APIRouter()
+
+@router.get("/live")
+def liveness():
+    return {"status": "alive"}
+
+@router.get("/ready")
+def readiness(request: Request):
+    # Ready only once the lifespan hook has loaded and warmed up the models
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    return {"status": "ready", "warmup_seconds": request.app.state.warmup_seconds}
@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from app.core.cache import analytics_cache
+from app.services.shadow_scoring import shadow_scorer
+from app.services.sketches import stream_sketches
+
+router = APIRouter()
+
+@router.get("/")
+def get_metrics():
+    return {
+        "analytics_cache": analytics_cache.stats(),
+        "shadow_scoring": {
+            "submitted": shadow_scorer.submitted,
+            "dropped": shadow_scorer.dropped,
+            "failed": shadow_scorer.failed,
+            "pending": shadow_scorer.pending,
+        },
+        "sketches": stream_sketches.stats(),
+    }
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.db.session import get_db
+from app.schemas.model import ShadowReport, ModelComparison
+from app.services.model_registry import registry
+from app.services.shadow_scoring import shadow_scorer, build_shadow_report
+
+router = APIRouter()
+
+@router.get("/shadow-report", response_model=ShadowReport)
+def get_shadow_report(hours: int = 24, db: Session = Depends(get_db)):
+    registry.load()
+    return ShadowReport(
+        champion=registry.champion.name if registry.champion else None,
+        challengers=[c.name for c in registry.challengers],
+        window_hours=hours,
+        submitted=shadow_scorer.submitted,
+        dropped=shadow_scorer.dropped,
+        models=[ModelComparison(**row) for row in build_shadow_report(db, hours)],
+    )
@@ -4,14 +4,21 @@ from app.api.v1.endpoints import transactions
 from app.db.session import get_db
 from app.schemas.transaction import TransactionCreate, TransactionResponse
 from app.services.fraud_detector import FraudDetector
-import app.models.transaction
+from app.services.ingest_shards import ingestor
+from starlette.concurrency import run_in_threadpool
+from app.core.responses import FastJSONResponse, NDJSONResponse, iter_ndjson
+from app.models.transaction import Transaction
+from app.services.exporter import export_response
+from sqlalchemy import select
+from datetime import datetime
+from typing import Literal, Optional
 import uuid
 
 # We need to recreate the router to overwrite the placeholder
 router = APIRouter()
 
 @router.post("/", response_model=TransactionResponse)
-def ingest_transaction(
+async def ingest_transaction(
     transaction: TransactionCreate, 
     db: Session = Depends(get_db)
 ):
@@ -19,13 +26,51 @@ def ingest_transaction(
     if not transaction.id:
         transaction.id = str(uuid.uuid4())
     
-    detector = FraudDetector(db)
-    # Synchronous processing for now
-    db_transaction, alert = detector.process_transaction(transaction)
+    if ingestor.running:
+        # Single writer per account: concurrent requests can't both miss the velocity rule
+        db_transaction, alert = await ingestor.submit(transaction)
+    else:
+        db_transaction, alert = await run_in_threadpool(
+            lambda: FraudDetector(db).process_transaction(transaction)
+        )
     
     return db_transaction
 
+# Column-only reads return plain rows, skipping ORM identity-map and from_attributes overhead
+TRANSACTION_COLUMNS = [
+    Transaction.id, Transaction.account_id, Transaction.amount, Transaction.currency,
+    Transaction.merchant_category, Transaction.location_lat, Transaction.location_lon,
+    Transaction.channel, Transaction.timestamp, Transaction.is_flagged, Transaction.risk_score,
+]
+
 @router.get("/", response_model=list[TransactionResponse])
-def get_transactions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    transactions = db.query(app.models.transaction.Transaction).order_by(app.models.transaction.Transaction.timestamp.desc()).offset(skip).limit(limit).all()
-    return transactions
+def get_transactions(
+    skip: int = 0,
+    limit: int = 100,
+    format: Literal["json", "ndjson"] = "json",
+    db: Session = Depends(get_db)
+):
+    query = db.query(*TRANSACTION_COLUMNS).order_by(Transaction.timestamp.desc()).offset(skip).limit(limit)
+    if format == "ndjson":
+        return NDJSONResponse(iter_ndjson(row._asdict() for row in query.yield_per(1000)))
+    return FastJSONResponse([row._asdict() for row in query.all()])
+
+@router.get("/export")
+def export_transactions(
+    format: Literal["csv", "ndjson", "parquet"] = "csv",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    account_id: Optional[str] = None,
+    flagged: Optional[bool] = None,
+    db: Session = Depends(get_db)
+):
+    stmt = select(*TRANSACTION_COLUMNS).order_by(Transaction.timestamp)
+    if since:
+        stmt = stmt.where(Transaction.timestamp >= since)
+    if until:
+        stmt = stmt.where(Transaction.timestamp < until)
+    if account_id:
+        stmt = stmt.where(Transaction.account_id == account_id)
+    if flagged is not None:
+        stmt = stmt.where(Transaction.is_flagged == flagged)
+    return export_response(db, stmt, TRANSACTION_COLUMNS, format, "transactions")
@@ -0,0 +1,150 @@
+import hashlib
+import importlib
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+from fastapi import Request
+from fastapi.responses import Response
+from app.core.config import settings
+
+
+class CacheBackend(ABC):
+    """Minimal interface a shared cache (e.g. Redis) has to provide to back the response cache."""
+
+    @abstractmethod
+    def get(self, key: str) -> Any | None: ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float) -> None: ...
+
+    @abstractmethod
+    def incr(self, key: str) -> int: ...
+
+    @abstractmethod
+    def get_counter(self, key: str) -> int: ...
+
+    def __len__(self) -> int:
+        return 0
+
+
+class MemoryCache(CacheBackend):
+    """In-process cache with per-entry TTL and least-recently-used eviction."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ResponseCache:
+    """Caches rendered GET responses, invalidated wholesale by bumping a generation counter.
+
+    Writers never have to know which cached responses they affect: every key
+    embeds the current generation, so after a bump old entries simply stop
+    being looked up and age out of the LRU.
+    """
+
+    GENERATION_KEY = "analytics:generation"
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    @property
+    def generation(self) -> int:
+        return self.backend.get_counter(self.GENERATION_KEY)
+
+    def bump_generation(self) -> int:
+        return self.backend.incr(self.GENERATION_KEY)
+
+    def key_for(self, request: Request) -> str:
+        query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+        return f"analytics:{self.generation}:{request.url.path}?{query}"
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.backend),
+            "generation": self.generation,
+        }
+
+    def _respond(self, request: Request, body: bytes, headers: dict, etag: str, status: str) -> Response:
+        headers = {**headers, "etag": etag, "cache-control": "no-cache", "x-cache": status}
+        if etag in request.headers.get("if-none-match", ""):
+            self.not_modified += 1
+            headers.pop("content-length", None)
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, status_code=200, headers=headers)
+
+    async def __call__(self, request: Request, call_next):
+        key = self.key_for(request)
+        cached = self.backend.get(key)
+        if cached is not None:
+            self.hits += 1
+            body, headers, etag = cached
+            return self._respond(request, body, headers, etag, "HIT")
+
+        self.misses += 1
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = {k: v for k, v in response.headers.items() if k not in ("etag", "x-cache")}
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.backend.set(key, (body, headers, etag), self.ttl)
+        return self._respond(request, body, headers, etag, "MISS")
+
+
+def _load_backend() -> CacheBackend:
+    # ANALYTICS_CACHE_BACKEND="package.module:factory" plugs in a shared cache across workers
+    if settings.ANALYTICS_CACHE_BACKEND:
+        module_name, _, attr = settings.ANALYTICS_CACHE_BACKEND.partition(":")
+        backend = getattr(importlib.import_module(module_name), attr)()
+        if not isinstance(backend, CacheBackend):
+            raise TypeError(f"{settings.ANALYTICS_CACHE_BACKEND} must return a CacheBackend, got {type(backend).__name__}")
+        return backend
+    return MemoryCache(max_entries=settings.ANALYTICS_CACHE_MAX_ENTRIES)
+
+
+analytics_cache = ResponseCache(_load_backend(), ttl=settings.ANALYTICS_CACHE_TTL)
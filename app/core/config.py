@@ -11,6 +11,67 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     BACKEND_CORS_ORIGINS: list[str] = ["http://localhost", "http://localhost:5173", "http://localhost:8080"]
 
+    # ML models: the champion scores live traffic, challengers only run in shadow mode
+    ML_MODEL_DIR: str = "app/ml_models"
+    CHAMPION_MODEL: str = "isolation_forest.pkl"
+    LABEL_ENCODER: str = "label_encoder.pkl"
+    CHALLENGER_MODELS: list[str] = []
+    # The ML rule fires above this calibrated risk (0-100); 88 is the model's own boundary.
+    # Per-category overrides, e.g. ML_RISK_THRESHOLDS='{"luxury": 95, "food": 80}'. A hit always
+    # flags: below the flag threshold (50), the score is raised to just above it.
+    ML_RISK_THRESHOLD: float = 88
+    ML_RISK_THRESHOLDS: dict[str, float] = {}
+    SHADOW_MAX_PENDING: int = 1000 # Shadow jobs queued beyond this are dropped
+    SHADOW_BATCH_SIZE: int = 200 # Shadow jobs are scored and written in batches of this size...
+    SHADOW_FLUSH_INTERVAL_MS: int = 500 # ...or at least this often
+    SHADOW_OUT_OF_PROCESS: bool = True # Score challengers in a worker process, off the ingest GIL
+
+    # Bulk alert updates commit every chunk of ids to keep write locks short
+    ALERT_UPDATE_CHUNK_SIZE: int = 5000
+
+    # Incremental retraining keeps a bounded reservoir sample instead of rescanning history
+    TRAINING_SAMPLE_SIZE: int = 50000
+    TRAINING_SAMPLE_FILE: str = "training_sample.pkl"
+    # Timestamps are set before commit, so each run rereads this far below its watermarks.
+    # Keep it above the longest write transaction, including a bulk alert status update.
+    TRAINING_WATERMARK_LAG: int = 600 # Seconds
+
+    # Analytics response cache; entries are also invalidated when flagged transactions are written
+    ANALYTICS_CACHE_TTL: int = 10 # Seconds
+    ANALYTICS_CACHE_MAX_ENTRIES: int = 256
+    ANALYTICS_CACHE_BACKEND: str = "" # "module:factory" returning a CacheBackend, empty for in-process
+
+    # Default response class: "json" (FastAPI's encoder) or "orjson"
+    DEFAULT_RESPONSE_CLASS: str = "json"
+
+    # Exports stream this many rows per fetch from the database cursor
+    EXPORT_CHUNK_SIZE: int = 5000
+
+    # Per-account profiles: bounded in-process cache, written through to account_profiles
+    ACCOUNT_PROFILE_CACHE_SIZE: int = 100000
+    ACCOUNT_PROFILE_TTL: int = 300 # Seconds; bounds staleness when several workers share the table
+
+    # Sharded ingestion: 0 processes each request inline, serialized per account by a lock.
+    # With N > 0, transactions are routed by account to N single-writer queues instead, which
+    # also keeps arrival order. Either way this is per process: with several uvicorn workers,
+    # route by account at the load balancer.
+    INGEST_SHARDS: int = 0
+    INGEST_QUEUE_SIZE: int = 1000
+
+    # Streaming sketches over tumbling windows (approximate distinct counts and heavy hitters)
+    SKETCH_WINDOW_MINUTES: int = 60
+    SKETCH_HLL_PRECISION: int = 8 # 256 bytes per key, ~6.5% relative error
+    SKETCH_MAX_KEYS: int = 100000 # Per-account and per-cell sketches kept in an LRU
+    SKETCH_TOP_K: int = 100
+    SKETCH_CMS_WIDTH: int = 2048
+    SKETCH_CMS_DEPTH: int = 4
+    # Merchant Spread fires at this many distinct merchant categories per account and window; 0 turns it off
+    MERCHANT_SPREAD_COUNT: int = 0
+
+    # In-memory window of recent transactions, in entries across all shards (26 bytes each).
+    # 0 disables it; e.g. 10_000_000 is ~260 MB.
+    TXN_WINDOW_CAPACITY: int = 0
+
     model_config = {"env_file": ".env", "extra": "ignore"}
 
 settings = Settings()
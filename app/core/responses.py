@@ -0,0 +1,56 @@
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, Iterator
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the standard library
+    orjson = None
+
+
+def _default(obj: Any):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when it is installed.
+
+    Endpoints that return this directly skip response_model validation, so
+    content must already be plain dicts/lists (e.g. rows from a column query).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def iter_ndjson(rows: Iterable[dict], batch_size: int = 500) -> Iterator[bytes]:
+    """Encodes rows as newline-delimited JSON, yielding one chunk per ``batch_size`` rows."""
+    batch = []
+    for row in rows:
+        batch.append(dumps(row))
+        if len(batch) >= batch_size:
+            yield b"\n".join(batch) + b"\n"
+            batch = []
+    if batch:
+        yield b"\n".join(batch) + b"\n"
+
+
+class NDJSONResponse(StreamingResponse):
+    media_type = "application/x-ndjson"
+
+
+def default_response_class() -> type[JSONResponse]:
+    # "json" keeps FastAPI's own encoder, which already serializes response_model output via Pydantic
+    if settings.DEFAULT_RESPONSE_CLASS == "orjson":
+        return FastJSONResponse
+    return JSONResponse
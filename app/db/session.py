@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
@@ -8,7 +8,24 @@ from app.core.config import settings
 # Using sync for easier debugging first.
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
+def use_sqlite_wal(engine):
+    """Switches file SQLite databases to write-ahead logging.
+
+    With the default rollback journal, an open read (e.g. a streaming export)
+    blocks every commit until it finishes; in WAL mode readers and the
+    writer don't wait on each other.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_journal_mode(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
 engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
+use_sqlite_wal(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
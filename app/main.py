@@ -1,11 +1,40 @@
-from fastapi import FastAPI
-from app.api.v1.endpoints import transactions, alerts, analytics
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from starlette.concurrency import run_in_threadpool
+from app.api.v1.endpoints import transactions, alerts, analytics, models, metrics, health, accounts
+from app.core.cache import analytics_cache
+from app.core.responses import default_response_class
 from app.core.config import settings
 
 from app.core.config import settings
 from fastapi.middleware.cors import CORSMiddleware
+from app.services.model_registry import registry
+from app.services.shadow_scoring import shadow_scorer
+from app.services.ingest_shards import ingestor
 
-app = FastAPI(title=settings.PROJECT_NAME)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # joblib/scikit-learn are only imported here, so importing the app stays cheap
+    app.state.warmup_seconds = round(await run_in_threadpool(registry.warm_up), 3)
+    print(f"✅ Models warmed up in {app.state.warmup_seconds}s")
+    if settings.INGEST_SHARDS:
+        await ingestor.start()
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    if ingestor.running:
+        await ingestor.stop()
+    shadow_scorer.shutdown()
+
+app = FastAPI(title=settings.PROJECT_NAME, default_response_class=default_response_class(), lifespan=lifespan)
+app.state.ready = False
+
+# Registered before CORS so cached responses never carry another origin's CORS headers
+@app.middleware("http")
+async def cache_analytics(request: Request, call_next):
+    if request.method == "GET" and request.url.path.startswith("/api/v1/analytics/"):
+        return await analytics_cache(request, call_next)
+    return await call_next(request)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,3 +51,7 @@ def read_root():
 app.include_router(transactions.router, prefix="/api/v1/transactions", tags=["transactions"])
 app.include_router(alerts.router, prefix="/api/v1/alerts", tags=["alerts"])
 app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["analytics"])
+app.include_router(accounts.router, prefix="/api/v1/accounts", tags=["accounts"])
+app.include_router(models.router, prefix="/api/v1/models", tags=["models"])
+app.include_router(metrics.router, prefix="/api/v1/metrics", tags=["metrics"])
+app.include_router(health.router, prefix="/health", tags=["health"])
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime
+from app.db.base import Base
+
+class AccountProfile(Base):
+    """Running per-account aggregates, maintained at ingest instead of recomputed from transactions."""
+    __tablename__ = "account_profiles"
+
+    account_id = Column(String, primary_key=True)
+    txn_count = Column(Integer, default=0, nullable=False)
+    total_amount = Column(Float, default=0.0, nullable=False)
+    total_amount_sq = Column(Float, default=0.0, nullable=False) # For the running std
+    flagged_count = Column(Integer, default=0, nullable=False)
+    last_lat = Column(Float, nullable=True)
+    last_lon = Column(Float, nullable=True)
+    last_seen = Column(DateTime(timezone=True), nullable=True)
+    recent_timestamps = Column(String, nullable=True) # JSON [timestamp, amount] pairs, only the velocity window
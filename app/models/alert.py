@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, text
 from sqlalchemy.sql import func
 from app.db.base import Base
 
@@ -11,4 +11,13 @@ class Alert(Base):
     severity = Column(String) # High, Medium, Low
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     details = Column(String, nullable=True)
-    status = Column(String, default='new') # new, read
+    status = Column(String, default='new') # new, read, confirmed_fraud, false_positive
+
+    __table_args__ = (
+        # Untriaged alerts are a small, hot slice of the table
+        Index(
+            "ix_alerts_status_new", "id",
+            sqlite_where=text("status = 'new'"),
+            postgresql_where=text("status = 'new'"),
+        ),
+    )
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class TransactionLabel(Base):
+    """Analyst outcome for a transaction, written when its alert is triaged."""
+    __tablename__ = "transaction_labels"
+
+    transaction_id = Column(String, primary_key=True)
+    is_fraud = Column(Boolean, nullable=False) # confirmed_fraud -> True, false_positive -> False
+    labeled_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+class ModelTrainingRun(Base):
+    __tablename__ = "model_training_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    version = Column(Integer, nullable=False)
+    model_file = Column(String)
+    transaction_watermark = Column(DateTime(timezone=True), nullable=True)
+    label_watermark = Column(DateTime(timezone=True), nullable=True)
+    new_transactions = Column(Integer, default=0)
+    new_labels = Column(Integer, default=0)
+    sample_size = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class ShadowScore(Base):
+    __tablename__ = "shadow_scores"
+
+    id = Column(Integer, primary_key=True, index=True)
+    transaction_id = Column(String, index=True)
+    model_name = Column(String, index=True)
+    is_champion = Column(Boolean, default=False)
+    is_anomaly = Column(Boolean)
+    champion_anomaly = Column(Boolean) # Champion decision on the same features, for agreement
+    latency_ms = Column(Float)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class AccountProfileResponse(BaseModel):
+    account_id: str
+    txn_count: int
+    total_amount: float
+    avg_amount: float
+    std_amount: float
+    flagged_count: int
+    last_lat: Optional[float] = None
+    last_lon: Optional[float] = None
+    last_seen: Optional[datetime] = None
+    velocity_5m: int  # Transactions in the last 5 minutes
+    recent_amount_5m: float  # Amount spent in the last 5 minutes
+
+class AccountWindowStats(BaseModel):
+    account_id: str
+    minutes: int
+    count: int
+    total_amount: float
+    avg_amount: float
+    std_amount: float
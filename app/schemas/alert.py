@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List, Literal
 
 class AlertBase(BaseModel):
     transaction_id: str
@@ -18,3 +18,33 @@ class AlertResponse(AlertBase):
 
     class Config:
         from_attributes = True
+
+AlertStatus = Literal["new", "read", "confirmed_fraud", "false_positive"]
+
+class AlertFilter(BaseModel):
+    ids: Optional[List[int]] = None
+    id_min: Optional[int] = None
+    id_max: Optional[int] = None
+    severity: Optional[str] = None
+    rule: Optional[str] = None  # Substring of rule_triggered
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    account_id: Optional[str] = None
+    status: Optional[AlertStatus] = None  # Current status to match
+
+class AlertBulkStatusUpdate(AlertFilter):
+    new_status: AlertStatus
+    all: bool = False  # Must be set explicitly to update every alert without a filter
+
+    @model_validator(mode="after")
+    def require_filter_or_all(self):
+        # Empty strings are ignored by the filter, so they don't count as one either
+        has_filter = any(getattr(self, name) not in (None, "") for name in AlertFilter.model_fields)
+        if not has_filter and not self.all:
+            raise ValueError("Set at least one filter field, or 'all': true to update every alert")
+        return self
+
+class AlertBulkStatusResult(BaseModel):
+    status: str
+    new_status: str
+    updated: int
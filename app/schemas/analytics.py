@@ -40,3 +40,28 @@ class AnalyticsResponse(BaseModel):
     time_patterns: List[TimePattern]
     rule_contributions: List[RuleStat]
     geographic_distribution: List[GeoStat]
+
+class TopRiskAccount(BaseModel):
+    account_id: str
+    flagged_volume: float
+    max_overestimate: float
+
+class TopRiskAccounts(BaseModel):
+    window_start: datetime
+    window_minutes: int
+    total_flagged_volume: float
+    accounts: List[TopRiskAccount]
+
+class AccountFlaggedVolume(BaseModel):
+    account_id: str
+    window_start: datetime
+    window_minutes: int
+    flagged_volume: float
+    max_overestimate: float  # Count-Min bound, holds with probability 1 - e**-depth
+
+class LocationCellStats(BaseModel):
+    cell: str
+    window_start: datetime
+    window_minutes: int
+    distinct_accounts: int
+    relative_error: float  # HyperLogLog standard error
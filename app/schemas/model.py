@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class ModelComparison(BaseModel):
+    model: str
+    is_champion: bool
+    scored: int
+    flag_rate: float
+    flag_rate_delta: float  # Versus the champion on the same transactions
+    agreement_rate: float
+    avg_latency_ms: float
+    p99_latency_ms: float
+
+class ShadowReport(BaseModel):
+    champion: Optional[str] = None
+    challengers: List[str]
+    window_hours: int
+    submitted: int
+    dropped: int
+    models: List[ModelComparison]
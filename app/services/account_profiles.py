@@ -0,0 +1,204 @@
+import json
+import math
+import threading
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, case, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.core.cache import MemoryCache
+from app.core.config import settings
+from app.models.account_profile import AccountProfile
+from app.models.transaction import Transaction
+from app.services.sharding import shard_for
+
+VELOCITY_WINDOW = timedelta(minutes=5)
+LOCK_STRIPES = 1024
+# Running totals are written as increments, so concurrent writers add up instead of overwriting
+COUNTERS = ("txn_count", "total_amount", "total_amount_sq", "flagged_count")
+
+
+def naive_utc(ts: datetime | None) -> datetime | None:
+    # SQLite hands back naive datetimes, Postgres aware ones; profiles compare in naive UTC
+    if ts is not None and ts.tzinfo is not None:
+        return ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+@dataclass(frozen=True)
+class ProfileState:
+    """Immutable snapshot of an account; updates return a new snapshot."""
+    account_id: str
+    txn_count: int = 0
+    total_amount: float = 0.0
+    total_amount_sq: float = 0.0
+    flagged_count: int = 0
+    last_lat: float | None = None
+    last_lon: float | None = None
+    last_seen: datetime | None = None
+    recent: tuple[datetime, ...] = field(default_factory=tuple) # Sorted, trimmed to the velocity window
+    recent_amounts: tuple[float, ...] = field(default_factory=tuple) # Amount of each entry in ``recent``
+
+    @property
+    def avg_amount(self) -> float:
+        return self.total_amount / self.txn_count if self.txn_count else 0.0
+
+    @property
+    def std_amount(self) -> float:
+        # Population std, same as np.std over the account's amounts
+        if not self.txn_count:
+            return 0.0
+        variance = self.total_amount_sq / self.txn_count - self.avg_amount ** 2
+        return math.sqrt(max(variance, 0.0))
+
+    def velocity(self, now: datetime, window: timedelta = VELOCITY_WINDOW) -> int:
+        """Number of earlier transactions within ``window`` of ``now``."""
+        since = now - window
+        return sum(1 for ts in self.recent if ts >= since)
+
+    def recent_amount(self, now: datetime, window: timedelta = VELOCITY_WINDOW) -> float:
+        """Amount spent in earlier transactions within ``window`` of ``now``."""
+        since = now - window
+        return sum(amount for ts, amount in zip(self.recent, self.recent_amounts) if ts >= since)
+
+    def updated_with(self, amount: float, lat: float | None, lon: float | None, timestamp: datetime,
+                     is_flagged: bool, window: timedelta = VELOCITY_WINDOW) -> "ProfileState":
+        since = timestamp - window
+        kept = [(ts, a) for ts, a in zip(self.recent, self.recent_amounts) if ts >= since] + [(timestamp, amount)]
+        return replace(
+            self,
+            txn_count=self.txn_count + 1,
+            total_amount=self.total_amount + amount,
+            total_amount_sq=self.total_amount_sq + amount * amount,
+            flagged_count=self.flagged_count + (1 if is_flagged else 0),
+            last_lat=lat if lat is not None else self.last_lat,
+            last_lon=lon if lon is not None else self.last_lon,
+            last_seen=timestamp,
+            recent=tuple(ts for ts, _ in kept),
+            recent_amounts=tuple(a for _, a in kept),
+        )
+
+
+class ProfileCache:
+    """Bounded read-through / write-through cache of account profiles.
+
+    Misses are served from the account_profiles table, or bootstrapped once
+    from the transactions table for accounts that predate it. Hold ``lock``
+    from ``get`` until ``put`` so two requests for one account can't both
+    start from the same snapshot.
+    """
+
+    def __init__(self, max_entries: int | None = None, ttl: float | None = None):
+        self.ttl = ttl or settings.ACCOUNT_PROFILE_TTL
+        self.cache = MemoryCache(max_entries=max_entries or settings.ACCOUNT_PROFILE_CACHE_SIZE)
+        # Striped by account, so unrelated accounts rarely wait on each other
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def lock(self, account_id: str) -> threading.Lock:
+        return self._locks[shard_for(account_id, len(self._locks))]
+
+    def get(self, db: Session, account_id: str) -> ProfileState:
+        profile = self.cache.get(account_id)
+        if profile is None:
+            profile = self._load(db, account_id)
+            self.cache.set(account_id, profile, self.ttl)
+        return profile
+
+    def write(self, db: Session, before: ProfileState, after: ProfileState):
+        """Upserts the profile row in the caller's transaction; call ``put`` once it commits.
+
+        Counters are applied as ``after - before`` increments on top of whatever
+        the row holds, so writes from other workers are not lost. The last
+        location, last_seen and velocity timestamps are replaced.
+        """
+        values = dict(
+            account_id=after.account_id,
+            txn_count=after.txn_count,
+            total_amount=after.total_amount,
+            total_amount_sq=after.total_amount_sq,
+            flagged_count=after.flagged_count,
+            last_lat=after.last_lat,
+            last_lon=after.last_lon,
+            last_seen=after.last_seen,
+            recent_timestamps=json.dumps([[ts.isoformat(), a] for ts, a in zip(after.recent, after.recent_amounts)]),
+        )
+        changes = {k: v for k, v in values.items() if k != "account_id" and k not in COUNTERS}
+        for name in COUNTERS:
+            column = getattr(AccountProfile, name)
+            changes[name] = column + (getattr(after, name) - getattr(before, name))
+
+        dialect = db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            # A real upsert: two first writes for a new account must not hit the primary key
+            insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+            stmt = insert(AccountProfile).values(**values)
+            db.execute(stmt.on_conflict_do_update(index_elements=[AccountProfile.account_id], set_=changes))
+        else:
+            result = db.execute(
+                update(AccountProfile)
+                .where(AccountProfile.account_id == after.account_id)
+                .values(**changes)
+                .execution_options(synchronize_session=False)
+            )
+            if not result.rowcount:
+                db.add(AccountProfile(**values))
+
+    def put(self, profile: ProfileState):
+        self.cache.set(profile.account_id, profile, self.ttl)
+
+    def _load(self, db: Session, account_id: str) -> ProfileState:
+        row = db.get(AccountProfile, account_id)
+        if row is not None:
+            # [timestamp, amount] pairs; rows written before amounts were kept hold bare timestamps
+            recent = [(entry, 0.0) if isinstance(entry, str) else entry
+                      for entry in json.loads(row.recent_timestamps or "[]")]
+            return ProfileState(
+                account_id=account_id,
+                txn_count=row.txn_count,
+                total_amount=row.total_amount,
+                total_amount_sq=row.total_amount_sq,
+                flagged_count=row.flagged_count,
+                last_lat=row.last_lat,
+                last_lon=row.last_lon,
+                last_seen=naive_utc(row.last_seen),
+                recent=tuple(datetime.fromisoformat(ts) for ts, _ in recent),
+                recent_amounts=tuple(float(a) for _, a in recent),
+            )
+        return self._bootstrap(db, account_id)
+
+    def _bootstrap(self, db: Session, account_id: str) -> ProfileState:
+        count, total, total_sq, flagged, last_seen = db.query(
+            func.count(Transaction.id),
+            func.coalesce(func.sum(Transaction.amount), 0.0),
+            func.coalesce(func.sum(Transaction.amount * Transaction.amount), 0.0),
+            func.coalesce(func.sum(case((Transaction.is_flagged == True, 1), else_=0)), 0),
+            func.max(Transaction.timestamp),
+        ).filter(Transaction.account_id == account_id).one()
+        if not count:
+            return ProfileState(account_id=account_id)
+
+        last = db.query(Transaction.location_lat, Transaction.location_lon).filter(
+            Transaction.account_id == account_id,
+            Transaction.location_lat.isnot(None),
+        ).order_by(Transaction.timestamp.desc()).first()
+        recent = db.query(Transaction.timestamp, Transaction.amount).filter(
+            Transaction.account_id == account_id,
+            Transaction.timestamp >= datetime.utcnow() - VELOCITY_WINDOW,
+        ).order_by(Transaction.timestamp).all()
+
+        return ProfileState(
+            account_id=account_id,
+            txn_count=count,
+            total_amount=float(total),
+            total_amount_sq=float(total_sq),
+            flagged_count=int(flagged),
+            last_lat=last[0] if last else None,
+            last_lon=last[1] if last else None,
+            last_seen=naive_utc(last_seen),
+            recent=tuple(naive_utc(ts) for ts, _ in recent),
+            recent_amounts=tuple(float(a) for _, a in recent),
+        )
+
+
+profiles = ProfileCache()
@@ -0,0 +1,88 @@
+from datetime import datetime
+from sqlalchemy import func, select, update, delete, insert, literal, Boolean, DateTime
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.alert import Alert
+from app.models.label import TransactionLabel
+from app.models.transaction import Transaction
+from app.schemas.alert import AlertFilter
+
+# Triage outcomes that become training labels (status -> is_fraud)
+LABEL_STATUSES = {"confirmed_fraud": True, "false_positive": False}
+
+
+def alert_filter_conditions(criteria: AlertFilter) -> list:
+    """Translates an AlertFilter into SQL conditions on the alerts table."""
+    conditions = []
+    if criteria.ids is not None:
+        conditions.append(Alert.id.in_(criteria.ids))
+    if criteria.id_min is not None:
+        conditions.append(Alert.id >= criteria.id_min)
+    if criteria.id_max is not None:
+        conditions.append(Alert.id <= criteria.id_max)
+    if criteria.severity:
+        conditions.append(Alert.severity == criteria.severity)
+    if criteria.rule:
+        # Escaped: "%" or "_" in the input must not turn into a match-everything filter
+        conditions.append(Alert.rule_triggered.contains(criteria.rule, autoescape=True))
+    if criteria.since:
+        conditions.append(Alert.timestamp >= criteria.since)
+    if criteria.until:
+        conditions.append(Alert.timestamp < criteria.until)
+    if criteria.account_id:
+        conditions.append(Alert.transaction_id.in_(
+            select(Transaction.id).where(Transaction.account_id == criteria.account_id)
+        ))
+    if criteria.status:
+        # status = 'new' is served by the partial index ix_alerts_status_new
+        conditions.append(Alert.status == criteria.status)
+    return conditions
+
+
+def bulk_update_status(db: Session, criteria: AlertFilter, new_status: str,
+                       chunk_size: int | None = None) -> int:
+    """Moves every alert matching ``criteria`` to ``new_status`` and returns the affected row count.
+
+    The update is set-based, but split into id ranges of ``chunk_size`` that
+    are committed one at a time so SQLite never holds the write lock for the
+    whole table. Moving alerts to confirmed_fraud or false_positive also
+    records a TransactionLabel for the retraining job.
+    """
+    chunk_size = chunk_size or settings.ALERT_UPDATE_CHUNK_SIZE
+    conditions = alert_filter_conditions(criteria)
+    # Rows already in the target status are not touched (or counted)
+    conditions.append(Alert.status.is_distinct_from(new_status))
+
+    lo, hi = db.query(func.min(Alert.id), func.max(Alert.id)).filter(*conditions).one()
+    if lo is None:
+        return 0
+
+    updated = 0
+    for start in range(lo, hi + 1, chunk_size):
+        chunk = [*conditions, Alert.id >= start, Alert.id < start + chunk_size]
+        # Stamped per chunk, so labels commit close to their labeled_at for the retraining watermark
+        _sync_labels(db, chunk, new_status, datetime.utcnow())
+        result = db.execute(
+            update(Alert)
+            .where(*chunk)
+            .values(status=new_status)
+            .execution_options(synchronize_session=False)
+        )
+        updated += result.rowcount
+        db.commit()
+    return updated
+
+
+def _sync_labels(db: Session, conditions: list, new_status: str, labeled_at: datetime):
+    """Replaces the labels of the transactions behind the matched alerts, in the same transaction as the update."""
+    transaction_ids = select(Alert.transaction_id).where(*conditions)
+    db.execute(delete(TransactionLabel).where(TransactionLabel.transaction_id.in_(transaction_ids)))
+    if new_status in LABEL_STATUSES:
+        db.execute(insert(TransactionLabel).from_select(
+            ["transaction_id", "is_fraud", "labeled_at"],
+            select(
+                Alert.transaction_id,
+                literal(LABEL_STATUSES[new_status], Boolean),
+                literal(labeled_at, DateTime(timezone=True)),
+            ).where(*conditions).distinct(),
+        ))
@@ -0,0 +1,46 @@
+import numpy as np
+
+# Risk at the model's own decision boundary (score_samples == offset_). An ML hit used to be
+# pinned to 88; anything scored below the boundary maps strictly above it, so with the default
+# threshold the ML rule fires exactly where predict() did.
+BOUNDARY_RISK = 88.0
+
+
+def fit_calibration(scores, offset: float, knots: int = 50) -> dict:
+    """Fits a monotone lookup table from ``score_samples`` output to a 0-100 risk.
+
+    Quantile calibration anchored at the boundary: training rows on the normal
+    side spread over [0, 88] by their rank among normal rows, anomalies over
+    (88, 100] by their rank among anomalies. Lower scores are more anomalous,
+    so risk never increases with the score. Needs no labels.
+    """
+    scores = np.asarray(scores, dtype=float)
+    grid = np.linspace(0.0, 1.0, knots)
+    raw, risk = [], []
+
+    anomalies = scores[scores < offset]
+    if len(anomalies):
+        raw.append(np.quantile(anomalies, grid))
+        # The least anomalous knot stays one step above the boundary
+        risk.append(100.0 - (100.0 - BOUNDARY_RISK) * grid * (knots - 1) / knots)
+    raw.append([offset])
+    risk.append([BOUNDARY_RISK])
+    normals = scores[scores >= offset]
+    if len(normals):
+        raw.append(np.quantile(normals, grid))
+        risk.append(BOUNDARY_RISK * (1.0 - grid))
+
+    raw, risk = np.concatenate(raw), np.concatenate(risk)
+    # Tied knots keep their first (highest) risk, so the table stays monotone
+    raw, first = np.unique(raw, return_index=True)
+    return {"raw": raw.tolist(), "risk": risk[first].tolist()}
+
+
+def boundary_calibration(offset: float) -> dict:
+    """Table for models saved without one: linear over the full score_samples range [-1, 0]."""
+    return {"raw": [-1.0, offset, 0.0], "risk": [100.0, BOUNDARY_RISK, 0.0]}
+
+
+def apply_calibration(scores, table: dict):
+    # Outside the fitted range the end values hold (np.interp clamps)
+    return np.interp(scores, table["raw"], table["risk"])
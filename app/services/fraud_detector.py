@@ -3,123 +3,177 @@ from sqlalchemy import func
 from app.models.transaction import Transaction
 from app.models.alert import Alert
 from app.schemas.transaction import TransactionCreate
+from app.core.cache import analytics_cache
+from app.core.config import settings
+from app.services.account_profiles import ProfileState, profiles, VELOCITY_WINDOW
+from app.services.model_registry import registry
+from app.services.shadow_scoring import shadow_scorer
+from app.services.sketches import stream_sketches
+from app.services.txn_window import txn_window
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-import numpy as np
+import time
+
+@dataclass(frozen=True)
+class RuleConfig:
+    """Rule thresholds. The backtest replays history with alternative values."""
+    high_amount: float = 10000
+    velocity_count: int = 3
+    velocity_window: timedelta = VELOCITY_WINDOW
+    zscore_min_history: int = 5
+    zscore_alert: int = 60
+    merchant_spread_count: int = 0 # Distinct merchant categories per account and sketch window, 0 = off
+    ml_risk_threshold: float = 88 # The ML rule fires above this calibrated risk
+    ml_category_thresholds: dict[str, float] = field(default_factory=dict)
+    flag_threshold: int = 50
+
+    def ml_threshold(self, category: str | None) -> float:
+        return self.ml_category_thresholds.get(category, self.ml_risk_threshold)
+
+DEFAULT_RULES = RuleConfig(
+    merchant_spread_count=settings.MERCHANT_SPREAD_COUNT,
+    ml_risk_threshold=settings.ML_RISK_THRESHOLD,
+    ml_category_thresholds=dict(settings.ML_RISK_THRESHOLDS),
+)
+
+def apply_rules(amount: float, profile: ProfileState, now: datetime, ml_risk: float | None,
+                rules: RuleConfig = DEFAULT_RULES, distinct_merchants: int = 0,
+                category: str | None = None) -> list[str]:
+    """Deterministic rules over the account profile as of ``now``; no database access."""
+    triggered_rules = []
+
+    # Rule 1: High Amount
+    if amount > rules.high_amount:
+        triggered_rules.append("High Amount Transaction")
+
+    # Rule 2: Rapid Transactions
+    recent_count = profile.velocity(now, rules.velocity_window)
+
+    if recent_count >= rules.velocity_count:
+        triggered_rules.append("Rapid Transactions")
+
+    # Rule 3: Isolation Forest (Real AI), thresholded per merchant category
+    if ml_risk is not None and ml_risk > rules.ml_threshold(category):
+        triggered_rules.append("ML Anomaly (Isolation Forest)")
+
+    # Rule 4: Merchant Spread (approximate distinct count from the stream sketches)
+    if rules.merchant_spread_count and distinct_merchants >= rules.merchant_spread_count:
+        triggered_rules.append("Merchant Spread")
+
+    return triggered_rules
+
+def score_rules(amount: float, triggered_rules: list[str], profile: ProfileState,
+                rules: RuleConfig = DEFAULT_RULES, ml_risk: float | None = None) -> int:
+    """Risk score (0-100) for the triggered rules; may append the Z-Score rule."""
+    score = 0
+
+    # 1. Rule-Based Scoring (Hard Limits)
+    if "High Amount Transaction" in triggered_rules:
+        score = max(score, 95)
+    if "Rapid Transactions" in triggered_rules:
+        score = max(score, 80)
+    if "Merchant Spread" in triggered_rules:
+        score = max(score, 70)
+
+    # ML Score handling
+    # If ML detected it, the calibrated risk is the score (88 at the model's own boundary).
+    # A category threshold below flag_threshold still flags what it fires on.
+    if ml_risk is not None and any("ML Anomaly" in r for r in triggered_rules):
+         score = max(score, int(round(ml_risk)), rules.flag_threshold + 1)
+
+    # 2. Statistical Scoring (Z-Score)
+    # Running mean/std from the account profile instead of re-reading history
+    if profile.txn_count > rules.zscore_min_history:
+        mean = profile.avg_amount
+        std = profile.std_amount
+
+        if std > 0:
+            z_score = (amount - mean) / std
+            # Map Z-Score to 0-100 probability
+            # Z=2 (2 std devs) -> ~80%, Z=3 -> ~99%
+            stat_score = min(int(abs(z_score) * 30), 99)
+            if stat_score > rules.zscore_alert: # Threshold for considering it an anomaly worth mentioning
+                # Check if not already added to avoid duplicates if called multiple times (though unlikely here)
+                if not any(r.startswith("Z-Score") for r in triggered_rules):
+                     triggered_rules.append(f"Z-Score Anomaly (Risk: {stat_score}%)")
+
+            score = max(score, stat_score)
+
+    return min(score, 100) # Cap at 100
 
 class FraudDetector:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, rules: RuleConfig = DEFAULT_RULES, clock=datetime.utcnow):
         self.db = db
-        self.ml_model = None
-        self.label_encoder = None
-        
-        # Load ML Models if available
-        try:
-            import joblib
-            import os
-            model_path = "app/ml_models/isolation_forest.pkl"
-            encoder_path = "app/ml_models/label_encoder.pkl"
-            
-            if os.path.exists(model_path) and os.path.exists(encoder_path):
-                self.ml_model = joblib.load(model_path)
-                self.label_encoder = joblib.load(encoder_path)
-                print("🧠 AI Model loaded successfully.")
-            else:
-                print("⚠️ AI Model not found. Running in Rule-Only mode.")
-        except Exception as e:
-            print(f"⚠️ Failed to load AI Model: {e}")
+        self.rules = rules
+        # Injected so replays can run on a simulated clock
+        self.clock = clock
+        # Models are loaded once per process and shared between requests
+        self.registry = registry.load()
+        self.ml_model = self.registry.champion.estimator if self.registry.champion else None
+        self.label_encoder = self.registry.champion.label_encoder if self.registry.champion else None
+
+    def score_ml(self, amount: float, category: str) -> tuple[float | None, float]:
+        """Scores with the champion model, returning (calibrated risk or None, latency in ms)."""
+        champion = self.registry.champion
+        if not champion:
+            return None, 0.0
 
-    def check_ml_anomalies(self, amount: float, category: str) -> bool:
-        """Returns True if the transaction is an anomaly according to Isolation Forest."""
-        if not self.ml_model or not self.label_encoder:
-            return False
-            
         try:
-            # Safe encoding (handle unknown categories)
-            if category in self.label_encoder.classes_:
-                cat_code = self.label_encoder.transform([category])[0]
-            else:
-                # Basic fallback: encode as -1 or 0 (unknown)
-                cat_code = 0 
-                
-            prediction = self.ml_model.predict([[amount, cat_code]])
-            # Isolation Forest returns -1 for anomaly, 1 for normal
-            return prediction[0] == -1
+            start = time.perf_counter()
+            risk = champion.score_batch([amount], [category])[0]
+            return risk, (time.perf_counter() - start) * 1000
         except Exception as e:
             print(f"Error in ML prediction: {e}")
-            return False
+            return None, 0.0
 
-    def calculate_risk_score(self, transaction: TransactionCreate, triggered_rules: list[str]) -> int:
-        score = 0
-        
-        # 1. Rule-Based Scoring (Hard Limits)
-        if "High Amount Transaction" in triggered_rules:
-            score = max(score, 95)
-        if "Rapid Transactions" in triggered_rules:
-            score = max(score, 80)
-        
-        # ML Score handling
-        # If ML detected it, ensure high score
-        if any("ML Anomaly" in r for r in triggered_rules):
-             score = max(score, 88) # AI says it's weird
-
-        # 2. Statistical Scoring (Z-Score)
-        # Fetch history for this user
-        history = self.db.query(Transaction.amount).filter(
-            Transaction.account_id == transaction.account_id
-        ).limit(50).all()
-        
-        amounts = [h[0] for h in history]
-        if len(amounts) > 5:
-            mean = np.mean(amounts)
-            std = np.std(amounts)
-            
-            if std > 0:
-                z_score = (transaction.amount - mean) / std
-                # Map Z-Score to 0-100 probability
-                # Z=2 (2 std devs) -> ~80%, Z=3 -> ~99%
-                stat_score = min(int(abs(z_score) * 30), 99) 
-                if stat_score > 60: # Threshold for considering it an anomaly worth mentioning
-                    # Check if not already added to avoid duplicates if called multiple times (though unlikely here)
-                    if not any(r.startswith("Z-Score") for r in triggered_rules):
-                         triggered_rules.append(f"Z-Score Anomaly (Risk: {stat_score}%)")
-                
-                score = max(score, stat_score)
-        
-        return min(score, 100) # Cap at 100
+    def check_ml_anomalies(self, amount: float, category: str) -> bool:
+        """Returns True if the calibrated ML risk is above the category's threshold."""
+        risk = self.score_ml(amount, category)[0]
+        return risk is not None and risk > self.rules.ml_threshold(category)
 
-    def check_fraud(self, transaction: TransactionCreate) -> list[str]:
-        triggered_rules = []
-        
-        # Rule 1: High Amount
-        if transaction.amount > 10000:
-            triggered_rules.append("High Amount Transaction")
-
-        # Rule 2: Rapid Transactions
-        five_mins_ago = datetime.utcnow() - timedelta(minutes=5)
-        recent_count = self.db.query(Transaction).filter(
-            Transaction.account_id == transaction.account_id,
-            Transaction.timestamp >= five_mins_ago
-        ).count()
-        
-        if recent_count >= 3:
-            triggered_rules.append("Rapid Transactions")
+    def calculate_risk_score(self, transaction: TransactionCreate, triggered_rules: list[str],
+                             profile: ProfileState | None = None, ml_risk: float | None = None) -> int:
+        profile = profile or profiles.get(self.db, transaction.account_id)
+        return score_rules(transaction.amount, triggered_rules, profile, self.rules, ml_risk)
+
+    def check_fraud(self, transaction: TransactionCreate, profile: ProfileState | None = None,
+                    ml_score: tuple[float | None, float] | None = None) -> list[str]:
+        """Runs the rules; ``ml_score`` is a (risk, latency) pair from score_ml, computed if not given."""
+        profile = profile or profiles.get(self.db, transaction.account_id)
+        ml_risk, latency_ms = ml_score or self.score_ml(transaction.amount, transaction.merchant_category)
+        # Read-only: the sketches only record the transaction once it has committed
+        distinct_merchants = stream_sketches.distinct_merchants_with(
+            transaction.account_id, transaction.merchant_category, self.clock()
+        ) if self.rules.merchant_spread_count else 0
+        triggered_rules = apply_rules(
+            transaction.amount, profile, self.clock(), ml_risk, self.rules, distinct_merchants,
+            transaction.merchant_category
+        )
 
-        # Rule 3: Isolation Forest (Real AI)
-        if self.check_ml_anomalies(transaction.amount, transaction.merchant_category):
-            triggered_rules.append("ML Anomaly (Isolation Forest)")
+        # Challengers score the same features in the background, never on the request path
+        if self.registry.champion and self.registry.challengers and ml_risk is not None:
+            threshold = self.rules.ml_threshold(transaction.merchant_category)
+            shadow_scorer.submit(
+                transaction.id, [transaction.amount], [transaction.merchant_category],
+                self.registry.champion, [ml_risk > threshold], latency_ms,
+                self.registry.challengers, [threshold]
+            )
         
         return triggered_rules
 
-    def process_transaction(self, transaction_data: TransactionCreate) -> tuple[Transaction, Alert | None]:
+    def _score_and_save(self, transaction_data: TransactionCreate,
+                        ml_score: tuple[float | None, float]) -> tuple[Transaction, Alert | None]:
+        profile = profiles.get(self.db, transaction_data.account_id)
+
         # 1. Run Rules
         try:
-            triggered = self.check_fraud(transaction_data)
+            triggered = self.check_fraud(transaction_data, profile, ml_score)
         except Exception as e:
             print(f"Error checking fraud rules: {e}")
             triggered = []
 
         # 2. Calculate Score
-        final_score = self.calculate_risk_score(transaction_data, triggered)
+        final_score = self.calculate_risk_score(transaction_data, triggered, profile, ml_score[0])
         
         # 3. Save Transaction
         db_transaction = Transaction(
@@ -131,9 +185,9 @@ class FraudDetector:
             location_lat=transaction_data.location_lat,
             location_lon=transaction_data.location_lon,
             channel=transaction_data.channel,
-            timestamp=datetime.utcnow(),
+            timestamp=self.clock(),
             risk_score=final_score,
-            is_flagged=final_score > 50 # Flag if risk > 50%
+            is_flagged=final_score > self.rules.flag_threshold # Flag if risk > 50%
         )
         
         # Determine flag
@@ -148,9 +202,45 @@ class FraudDetector:
             self.db.add(alert)
             
         self.db.add(db_transaction)
+        updated_profile = profile.updated_with(
+            db_transaction.amount, db_transaction.location_lat, db_transaction.location_lon,
+            db_transaction.timestamp, db_transaction.is_flagged, self.rules.velocity_window
+        )
+        profiles.write(self.db, profile, updated_profile)
         self.db.commit()
+        # Only cache what actually committed
+        profiles.put(updated_profile)
+        stream_sketches.observe(
+            db_transaction.account_id, db_transaction.merchant_category,
+            db_transaction.location_lat, db_transaction.location_lon, db_transaction.timestamp,
+            merchants=bool(self.rules.merchant_spread_count),
+        )
+        return db_transaction, alert
+
+    def process_transaction(self, transaction_data: TransactionCreate) -> tuple[Transaction, Alert | None]:
+        # One model call feeds every rule and the score
+        ml_score = self.score_ml(transaction_data.amount, transaction_data.merchant_category)
+
+        # Read, commit and cache the profile under the account's lock, so concurrent
+        # requests for one account see each other's transactions
+        with profiles.lock(transaction_data.account_id):
+            db_transaction, alert = self._score_and_save(transaction_data, ml_score)
+
+        # The transaction is committed; a window failure must not turn it into an error response
+        try:
+            txn_window.append(
+                db_transaction.account_id, db_transaction.timestamp, db_transaction.amount,
+                db_transaction.merchant_category, db_transaction.location_lat, db_transaction.location_lon
+            )
+        except Exception as e:
+            print(f"⚠️ Error updating transaction window: {e}")
         self.db.refresh(db_transaction)
         if alert:
             self.db.refresh(alert)
+
+        # Flagged writes change what the analytics endpoints report
+        if db_transaction.is_flagged:
+            stream_sketches.record_flagged(db_transaction.account_id, db_transaction.amount, db_transaction.timestamp)
+            analytics_cache.bump_generation()
             
         return db_transaction, alert
@@ -0,0 +1,93 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.schemas.transaction import TransactionCreate
+from app.services.fraud_detector import FraudDetector
+from app.services.sharding import shard_for
+
+
+class ShardedIngestor:
+    """Routes each transaction to a fixed shard by account, one queue and one writer per shard.
+
+    All transactions of an account are processed one at a time, in arrival
+    order, by the same shard. Per-account state (profiles, velocity) therefore
+    has a single writer and its lock is never contended, while different
+    accounts still run in parallel across shards. Each transaction gets its own session from
+    ``session_factory``: the request's session is closed if the client
+    disconnects, while the shard may still be working.
+    """
+
+    def __init__(self, shards: int | None = None, queue_size: int | None = None,
+                 session_factory=SessionLocal):
+        self._configured_shards = shards
+        self._configured_queue_size = queue_size
+        self.session_factory = session_factory
+        self.shards = 0
+        self._queues: list[asyncio.Queue] = []
+        self._workers: list[asyncio.Task] = []
+        self._executors: list[ThreadPoolExecutor] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def running(self) -> bool:
+        # Queues belong to the loop that started them
+        try:
+            return self._loop is asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+    async def start(self):
+        # Settings are read at start so the lifespan hook sees the current configuration
+        self.shards = self._configured_shards or settings.INGEST_SHARDS
+        queue_size = self._configured_queue_size or settings.INGEST_QUEUE_SIZE
+        self._loop = asyncio.get_running_loop()
+        self._queues = [asyncio.Queue(maxsize=queue_size) for _ in range(self.shards)]
+        # The database work is blocking, so each shard gets its own thread
+        self._executors = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"ingest-{i}") for i in range(self.shards)
+        ]
+        self._workers = [asyncio.create_task(self._run(i)) for i in range(self.shards)]
+        print(f"🔀 Sharded ingestion started with {self.shards} shards")
+
+    async def stop(self):
+        for queue in self._queues:
+            await queue.put(None)
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        for executor in self._executors:
+            executor.shutdown(wait=True)
+        self._queues, self._workers, self._executors = [], [], []
+        self._loop = None
+
+    async def submit(self, transaction: TransactionCreate):
+        """Queues the transaction on its account's shard and waits for the processed result."""
+        future = asyncio.get_running_loop().create_future()
+        # Waits here when the shard is backed up, instead of growing the queue without bound
+        await self._queues[shard_for(transaction.account_id, self.shards)].put((transaction, future))
+        return await future
+
+    def _process(self, transaction: TransactionCreate):
+        db = self.session_factory()
+        try:
+            return FraudDetector(db).process_transaction(transaction)
+        finally:
+            db.close()
+
+    async def _run(self, shard: int):
+        queue = self._queues[shard]
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            transaction, future = item
+            try:
+                result = await loop.run_in_executor(self._executors[shard], self._process, transaction)
+                if not future.cancelled():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+
+
+ingestor = ShardedIngestor()
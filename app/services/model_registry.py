@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from app.core.config import settings
+
+
+class ScoringModel:
+    """An Isolation Forest with the label encoder and risk calibration it was trained with."""
+
+    def __init__(self, name: str, estimator, label_encoder, calibration: dict | None = None):
+        from app.services.calibration import boundary_calibration
+
+        self.name = name
+        self.estimator = estimator
+        self.label_encoder = label_encoder
+        # Same codes as label_encoder.transform, without its per-call validation overhead
+        self.category_codes = {c: i for i, c in enumerate(label_encoder.classes_)}
+        self.calibration = calibration or boundary_calibration(float(estimator.offset_))
+
+    def encode(self, categories: list[str]) -> list[int]:
+        # Safe encoding (handle unknown categories as 0)
+        return [self.category_codes.get(c, 0) for c in categories]
+
+    def raw_scores(self, amounts: list[float], categories: list[str]):
+        # Continuous output, lower is more anomalous; predict() would only keep its sign
+        X = [[amount, code] for amount, code in zip(amounts, self.encode(categories))]
+        return self.estimator.score_samples(X)
+
+    def score_batch(self, amounts: list[float], categories: list[str]) -> list[float]:
+        """Returns a calibrated 0-100 risk per row, using a single model call for the whole batch."""
+        from app.services.calibration import apply_calibration
+
+        return apply_calibration(self.raw_scores(amounts, categories), self.calibration).tolist()
+
+    def calibrate(self, amounts: list[float], categories: list[str]):
+        """Fits the calibration table on a sample of traffic, for models saved without one."""
+        from app.services.calibration import fit_calibration
+
+        self.calibration = fit_calibration(self.raw_scores(amounts, categories), float(self.estimator.offset_))
+
+
+class ModelRegistry:
+    """Loads the champion and challenger models once per process and shares them across requests."""
+
+    def __init__(self, model_dir: str | None = None, champion: str | None = None,
+                 challengers: list[str] | None = None, label_encoder: str | None = None):
+        self.model_dir = model_dir or settings.ML_MODEL_DIR
+        self.champion_file = champion or settings.CHAMPION_MODEL
+        self.challenger_files = list(settings.CHALLENGER_MODELS if challengers is None else challengers)
+        self.label_encoder_file = label_encoder or settings.LABEL_ENCODER
+        self.champion: ScoringModel | None = None
+        self.challengers: list[ScoringModel] = []
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load_model(self, filename: str, default_encoder) -> ScoringModel | None:
+        import joblib
+
+        path = os.path.join(self.model_dir, filename)
+        if not os.path.exists(path):
+            print(f"⚠️ Model file not found: {path}")
+            return None
+        obj = joblib.load(path)
+        name = os.path.splitext(filename)[0]
+        # Versioned artifacts are bundles carrying their own encoder
+        if isinstance(obj, dict):
+            model = ScoringModel(name, obj["model"], obj.get("label_encoder") or default_encoder, obj.get("calibration"))
+        elif default_encoder is None:
+            return None
+        else:
+            model = ScoringModel(name, obj, default_encoder)
+        if not isinstance(obj, dict) or obj.get("calibration") is None:
+            self._calibrate_from_sample(model)
+        return model
+
+    def _calibrate_from_sample(self, model: ScoringModel):
+        """Fits a missing calibration table on the retraining sample, if there is one."""
+        import joblib
+
+        sample_path = os.path.join(self.model_dir, settings.TRAINING_SAMPLE_FILE)
+        if not os.path.exists(sample_path):
+            print(f"⚠️ {model.name} has no calibration table: risk is a linear approximation. "
+                  "Re-run scripts/train_model.py to ship one.")
+            return
+        rows = joblib.load(sample_path)["rows"]
+        model.calibrate(rows["amount"].astype(float).tolist(), rows["merchant_category"].fillna("unknown").tolist())
+        print(f"📏 Calibrated {model.name} on {len(rows)} sampled transactions")
+
+    def load(self) -> "ModelRegistry":
+        if self._loaded:
+            return self
+        with self._lock:
+            if self._loaded:
+                return self
+            try:
+                import joblib
+
+                encoder_path = os.path.join(self.model_dir, self.label_encoder_file)
+                encoder = joblib.load(encoder_path) if os.path.exists(encoder_path) else None
+                self.champion = self._load_model(self.champion_file, encoder)
+                if self.champion:
+                    print("🧠 AI Model loaded successfully.")
+                else:
+                    print("⚠️ AI Model not found. Running in Rule-Only mode.")
+
+                self.challengers = []
+                for filename in self.challenger_files:
+                    challenger = self._load_model(filename, encoder)
+                    if challenger:
+                        self.challengers.append(challenger)
+                        print(f"🧪 Challenger model loaded: {challenger.name}")
+            except Exception as e:
+                print(f"⚠️ Failed to load AI Model: {e}")
+            self._loaded = True
+        return self
+
+    def warm_up(self) -> float:
+        """Loads the models and runs one prediction each so the first request doesn't pay for it.
+
+        Returns the time taken in seconds.
+        """
+        start = time.perf_counter()
+        self.load()
+        for model in ([self.champion] if self.champion else []) + self.challengers:
+            try:
+                model.score_batch([1.0], [model.label_encoder.classes_[0]])
+            except Exception as e:
+                print(f"⚠️ Warm-up failed for {model.name}: {e}")
+        return time.perf_counter() - start
+
+    def add_challenger(self, filename: str) -> ScoringModel | None:
+        """Loads an extra challenger at runtime (e.g. a freshly trained version)."""
+        self.load()
+        encoder = self.champion.label_encoder if self.champion else None
+        challenger = self._load_model(filename, encoder)
+        if challenger:
+            with self._lock:
+                self.challengers = [c for c in self.challengers if c.name != challenger.name] + [challenger]
+        return challenger
+
+
+registry = ModelRegistry()
@@ -0,0 +1,170 @@
+import os
+from datetime import datetime, timedelta
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import LabelEncoder
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.label import TransactionLabel, ModelTrainingRun
+from app.models.transaction import Transaction
+from app.services.calibration import fit_calibration
+
+SAMPLE_COLUMNS = ["id", "amount", "merchant_category"]
+
+
+def load_sample(path: str) -> tuple[pd.DataFrame, int, set, set]:
+    """Returns the maintained training sample, how many rows it has been drawn from,
+    and the transaction ids and label keys already read inside the watermark lag."""
+    if os.path.exists(path):
+        state = joblib.load(path)
+        return state["rows"], state["seen"], state.get("recent_tx", set()), state.get("recent_labels", set())
+    return pd.DataFrame(columns=SAMPLE_COLUMNS), 0, set(), set()
+
+
+def label_keys(labels: pd.DataFrame) -> list[tuple]:
+    # A relabel replaces the row, so the same transaction can come back with a new key
+    return list(zip(labels["id"], labels["is_fraud"], pd.to_datetime(labels["labeled_at"])))
+
+
+def advance(watermark, values: pd.Series):
+    # A late row read through the lag is older than the watermark and must not move it back
+    if values.empty:
+        return watermark
+    latest = values.max()
+    return latest if watermark is None else max(pd.Timestamp(watermark), latest)
+
+
+def recent_since(values: pd.Series, watermark, lag: timedelta) -> pd.Series:
+    """Rows inside the lag window below the new watermark, which the next run reads again."""
+    if watermark is None:
+        return pd.Series(False, index=values.index)
+    return pd.to_datetime(values) > pd.Timestamp(watermark) - lag
+
+
+def reservoir_merge(sample: pd.DataFrame, seen: int, new_rows: pd.DataFrame, capacity: int,
+                    rng: np.random.Generator) -> tuple[pd.DataFrame, int]:
+    """Algorithm R over a batch: the result is a uniform sample of all ``seen + len(new_rows)`` rows."""
+    if new_rows.empty:
+        return sample, seen
+
+    # Fill phase: while the reservoir has room, rows are taken as-is
+    room = max(capacity - len(sample), 0)
+    sample = pd.concat([sample, new_rows.iloc[:room]], ignore_index=True)
+    rest = new_rows.iloc[room:]
+    seen += min(room, len(new_rows))
+    if rest.empty:
+        return sample, seen
+
+    # Replacement phase: row t replaces a random slot with probability capacity / (t + 1)
+    positions = np.arange(seen, seen + len(rest))
+    slots = (rng.random(len(rest)) * (positions + 1)).astype(np.int64)
+    keep = slots < capacity
+    # Later rows win when they hit the same slot, as in the sequential algorithm
+    sample.iloc[slots[keep]] = rest[keep].to_numpy()
+    return sample, seen + len(rest)
+
+
+def retrain_incremental(db: Session, model_dir: str | None = None,
+                        capacity: int | None = None, seed: int = 42) -> ModelTrainingRun | None:
+    """Trains a new model version from data added since the last run's watermarks.
+
+    Only transactions and labels newer than the previous run are read. They are
+    merged into a bounded reservoir sample that is kept on disk between runs,
+    so retraining cost follows the amount of new data rather than table size.
+    Timestamps are set before commit, so each run reads back TRAINING_WATERMARK_LAG
+    seconds below the watermarks and skips the rows it already took by id.
+    Confirmed fraud is removed from the sample and false positives are added
+    to it, so the model learns that analyst-cleared patterns are normal.
+    Returns None when there is nothing new to learn from.
+    """
+    model_dir = model_dir or settings.ML_MODEL_DIR
+    capacity = capacity or settings.TRAINING_SAMPLE_SIZE
+    sample_path = os.path.join(model_dir, settings.TRAINING_SAMPLE_FILE)
+    rng = np.random.default_rng(seed)
+    lag = timedelta(seconds=settings.TRAINING_WATERMARK_LAG)
+
+    last_run = db.query(ModelTrainingRun).order_by(ModelTrainingRun.id.desc()).first()
+    tx_watermark = last_run.transaction_watermark if last_run else None
+    label_watermark = last_run.label_watermark if last_run else None
+
+    # 1. Only what changed since the last run, minus what the lag window already returned
+    sample, seen, recent_tx, recent_labels = load_sample(sample_path)
+    tx_query = db.query(Transaction.id, Transaction.amount, Transaction.merchant_category, Transaction.timestamp)
+    if tx_watermark:
+        tx_query = tx_query.filter(Transaction.timestamp > tx_watermark - lag)
+    read_tx = pd.DataFrame(tx_query.order_by(Transaction.timestamp).all(), columns=SAMPLE_COLUMNS + ["timestamp"])
+    new_tx = read_tx[~read_tx["id"].isin(recent_tx)]
+
+    label_query = db.query(
+        TransactionLabel.transaction_id, TransactionLabel.is_fraud, TransactionLabel.labeled_at,
+        Transaction.amount, Transaction.merchant_category
+    ).join(Transaction, Transaction.id == TransactionLabel.transaction_id)
+    if label_watermark:
+        label_query = label_query.filter(TransactionLabel.labeled_at > label_watermark - lag)
+    read_labels = pd.DataFrame(label_query.all(), columns=["id", "is_fraud", "labeled_at", "amount", "merchant_category"])
+    new_labels = read_labels[[key not in recent_labels for key in label_keys(read_labels)]]
+
+    if new_tx.empty and new_labels.empty:
+        print("✅ No new transactions or labels since the last run. Nothing to retrain.")
+        return None
+
+    # 2. Merge into the maintained sample
+    fraud_ids = set(new_labels.loc[new_labels["is_fraud"] == True, "id"])
+    clean_tx = new_tx[~new_tx["id"].isin(fraud_ids)][SAMPLE_COLUMNS]
+    sample, seen = reservoir_merge(sample, seen, clean_tx, capacity, rng)
+
+    sample = sample[~sample["id"].isin(fraud_ids)]
+    false_positives = new_labels.loc[new_labels["is_fraud"] == False, SAMPLE_COLUMNS]
+    false_positives = false_positives[~false_positives["id"].isin(sample["id"])]
+    sample = pd.concat([sample, false_positives], ignore_index=True)
+    if len(sample) > capacity:
+        sample = sample.sample(n=capacity, random_state=seed).reset_index(drop=True)
+
+    if len(sample) < 10:
+        print("⚠️ Not enough data to train (need > 10 transactions).")
+        return None
+
+    # 3. Train on the sample only
+    le = LabelEncoder()
+    codes = le.fit_transform(sample["merchant_category"].fillna("unknown"))
+    X = pd.DataFrame({"amount": sample["amount"].astype(float), "category_code": codes})
+    clf = IsolationForest(contamination=0.05, random_state=seed)
+    clf.fit(X)
+    calibration = fit_calibration(clf.score_samples(X), clf.offset_)
+
+    # 4. Save a new version; promotion to champion stays a config change
+    version = (last_run.version + 1) if last_run else 1
+    model_file = f"isolation_forest_v{version}.pkl"
+    os.makedirs(model_dir, exist_ok=True)
+    joblib.dump(
+        {"model": clf, "label_encoder": le, "calibration": calibration,
+         "version": version, "trained_at": datetime.utcnow()},
+        os.path.join(model_dir, model_file),
+    )
+
+    tx_watermark = advance(tx_watermark, new_tx["timestamp"])
+    label_watermark = advance(label_watermark, new_labels["labeled_at"])
+    joblib.dump({
+        "rows": sample.reset_index(drop=True),
+        "seen": seen,
+        "recent_tx": set(read_tx.loc[recent_since(read_tx["timestamp"], tx_watermark, lag), "id"]),
+        "recent_labels": {key for key, recent in zip(
+            label_keys(read_labels), recent_since(read_labels["labeled_at"], label_watermark, lag)
+        ) if recent},
+    }, sample_path)
+
+    run = ModelTrainingRun(
+        version=version,
+        model_file=model_file,
+        transaction_watermark=tx_watermark,
+        label_watermark=label_watermark,
+        new_transactions=len(new_tx),
+        new_labels=len(new_labels),
+        sample_size=len(sample),
+    )
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    return run
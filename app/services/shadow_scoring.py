@@ -0,0 +1,226 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import func, case, insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.shadow_score import ShadowScore
+from app.services.model_registry import ScoringModel
+
+_worker_models: dict[str, ScoringModel] = {}
+
+
+def _init_worker(challengers: list[ScoringModel]):
+    global _worker_models
+    _worker_models = {c.name: c for c in challengers}
+
+
+def score_challengers(challengers, amounts: list[float], categories: list[str]) -> dict[str, tuple[list[float], float]]:
+    """Scores a whole batch with each challenger: {name: (risks, latency in ms per row)}."""
+    results = {}
+    for challenger in challengers:
+        start = time.perf_counter()
+        risks = challenger.score_batch(amounts, categories)
+        results[challenger.name] = (risks, (time.perf_counter() - start) * 1000 / max(len(amounts), 1))
+    return results
+
+
+def _score_in_worker(names: list[str], amounts: list[float], categories: list[str]):
+    return score_challengers([_worker_models[n] for n in names], amounts, categories)
+
+
+class ShadowScorer:
+    """Scores challenger models off the request path and logs their decisions.
+
+    ``submit`` only appends to an in-memory buffer. A background thread takes
+    the buffer every SHADOW_BATCH_SIZE jobs or SHADOW_FLUSH_INTERVAL_MS, scores
+    it with one vectorized call per challenger in a separate worker process (so
+    challengers don't compete with ingestion for the GIL), and writes all rows
+    with one insert and one commit. When more than ``max_pending`` jobs are
+    waiting, new ones are dropped so a slow challenger never backs up into the
+    champion's latency. Challenger latency is the batch time per row.
+    """
+
+    def __init__(self, max_pending: int | None = None, session_factory=SessionLocal,
+                 batch_size: int | None = None, flush_interval_ms: int | None = None,
+                 out_of_process: bool | None = None):
+        self.max_pending = max_pending or settings.SHADOW_MAX_PENDING
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.SHADOW_BATCH_SIZE
+        self.flush_interval = (flush_interval_ms or settings.SHADOW_FLUSH_INTERVAL_MS) / 1000
+        self.out_of_process = settings.SHADOW_OUT_OF_PROCESS if out_of_process is None else out_of_process
+        self.submitted = 0
+        self.dropped = 0
+        self.failed = 0
+        self._buffer: list[tuple] = []
+        self._in_flight = 0
+        self._flush_requested = False
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_models: tuple[str, ...] = ()
+        self._cond = threading.Condition()
+
+    def submit(self, transaction_id: str, amounts: list[float], categories: list[str],
+               champion: ScoringModel, champion_flags: list[bool], champion_latency_ms: float,
+               challengers: list[ScoringModel], thresholds: list[float]) -> bool:
+        """Queues the challengers; a row counts as an anomaly when its risk is above its threshold."""
+        if not challengers:
+            return False
+        with self._cond:
+            if self.pending >= self.max_pending:
+                self.dropped += 1
+                return False
+            self.submitted += 1
+            self._buffer.append((
+                transaction_id, amounts, categories, champion.name,
+                champion_flags, champion_latency_ms, tuple(challengers), thresholds,
+            ))
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._loop, name="shadow", daemon=True)
+                self._thread.start()
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopping or self._flush_requested or len(self._buffer) >= self.batch_size,
+                    timeout=self.flush_interval,
+                )
+                batch, self._buffer = self._buffer, []
+                self._flush_requested = False
+                self._in_flight = len(batch)
+                stopping = self._stopping
+            if batch:
+                self._flush(batch)
+            with self._cond:
+                self._in_flight = 0
+                self._cond.notify_all()
+            if stopping:
+                return
+
+    def _score(self, challengers: tuple[ScoringModel, ...], amounts, categories):
+        if not self.out_of_process:
+            return score_challengers(challengers, amounts, categories)
+        names = tuple(c.name for c in challengers)
+        if self._pool is None or self._pool_models != names:
+            # The worker gets its own copy of the models, once per set of challengers
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+            self._pool = ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker, initargs=(list(challengers),),
+            )
+            self._pool_models = names
+        return self._pool.submit(_score_in_worker, list(names), amounts, categories).result()
+
+    def _flush(self, batch: list[tuple]):
+        try:
+            groups: dict[tuple, list[tuple]] = {}
+            for job in batch:
+                groups.setdefault(job[6], []).append(job)
+
+            rows = []
+            for challengers, jobs in groups.items():
+                amounts = [a for job in jobs for a in job[1]]
+                categories = [c for job in jobs for c in job[2]]
+                thresholds = [t for job in jobs for t in job[7]]
+                results = self._score(challengers, amounts, categories)
+
+                offset = 0
+                for transaction_id, job_amounts, _, champion_name, champion_flags, champion_latency_ms, _, _ in jobs:
+                    champion_anomaly = champion_flags[0]
+                    rows.append(dict(
+                        transaction_id=transaction_id, model_name=champion_name, is_champion=True,
+                        is_anomaly=champion_anomaly, champion_anomaly=champion_anomaly,
+                        latency_ms=champion_latency_ms,
+                    ))
+                    # Challengers saw exactly the feature batch the champion scored
+                    for name, (risks, latency_ms) in results.items():
+                        rows.append(dict(
+                            transaction_id=transaction_id, model_name=name, is_champion=False,
+                            is_anomaly=risks[offset] > thresholds[offset], champion_anomaly=champion_anomaly,
+                            latency_ms=latency_ms,
+                        ))
+                    offset += len(job_amounts)
+
+            db = self.session_factory()
+            try:
+                db.execute(insert(ShadowScore), rows)
+                db.commit()
+            finally:
+                db.close()
+        except Exception as e:
+            with self._cond:
+                self.failed += len(batch)
+            print(f"Error in shadow scoring: {e}")
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer) + self._in_flight
+
+    def drain(self, timeout: float | None = None) -> bool:
+        """Flushes the buffer now and blocks until all queued shadow jobs have been written."""
+        with self._cond:
+            # Wake the flusher instead of waiting out the interval
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self.pending == 0, timeout=timeout)
+
+    def shutdown(self):
+        thread = self._thread
+        if thread is not None:
+            with self._cond:
+                self._stopping = True
+                self._cond.notify_all()
+            thread.join()
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+            self._pool_models = ()
+
+
+def build_shadow_report(db: Session, hours: int = 24) -> list[dict]:
+    """Per-model agreement with the champion, flag-rate delta and latency over the last ``hours``."""
+    since = datetime.utcnow() - timedelta(hours=hours)
+    window = ShadowScore.timestamp >= since
+
+    results = db.query(
+        ShadowScore.model_name,
+        func.max(case((ShadowScore.is_champion == True, 1), else_=0)),
+        func.count(ShadowScore.id),
+        func.avg(case((ShadowScore.is_anomaly == True, 1.0), else_=0.0)),
+        func.avg(case((ShadowScore.champion_anomaly == True, 1.0), else_=0.0)),
+        func.avg(case((ShadowScore.is_anomaly == ShadowScore.champion_anomaly, 1.0), else_=0.0)),
+        func.avg(ShadowScore.latency_ms),
+    ).filter(window).group_by(ShadowScore.model_name).all()
+
+    report = []
+    for name, is_champion, count, flag_rate, champion_rate, agreement, avg_latency in results:
+        # p99 without loading every latency: skip the slowest 1% and take the next one
+        p99 = db.query(ShadowScore.latency_ms).filter(
+            window, ShadowScore.model_name == name
+        ).order_by(ShadowScore.latency_ms.desc()).offset(count // 100).limit(1).scalar()
+
+        report.append({
+            "model": name,
+            "is_champion": bool(is_champion),
+            "scored": count,
+            "flag_rate": round(flag_rate or 0.0, 4),
+            "flag_rate_delta": round((flag_rate or 0.0) - (champion_rate or 0.0), 4),
+            "agreement_rate": round(agreement or 0.0, 4),
+            "avg_latency_ms": round(avg_latency or 0.0, 3),
+            "p99_latency_ms": round(p99 or 0.0, 3),
+        })
+    return sorted(report, key=lambda r: (not r["is_champion"], r["model"]))
+
+
+shadow_scorer = ShadowScorer()
@@ -0,0 +1,6 @@
+import zlib
+
+
+def shard_for(account_id: str, shards: int) -> int:
+    # crc32 rather than hash(): stable across processes, so a load balancer can route the same way
+    return zlib.crc32(account_id.encode("utf-8")) % shards
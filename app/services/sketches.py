@@ -0,0 +1,299 @@
+import hashlib
+import math
+import threading
+from array import array
+from datetime import datetime, timedelta, timezone
+from app.core.cache import MemoryCache
+from app.core.config import settings
+
+
+def hash64(item: str) -> int:
+    # blake2b rather than hash(): stable across processes, so sketches from several workers can be merged
+    return int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def window_id(ts: datetime, width: timedelta) -> int:
+    """Index of the tumbling window containing ``ts`` (naive timestamps are UTC)."""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp() // width.total_seconds())
+
+
+def window_start(wid: int, width: timedelta) -> datetime:
+    return datetime.fromtimestamp(wid * width.total_seconds(), tz=timezone.utc).replace(tzinfo=None)
+
+
+class HyperLogLog:
+    """Distinct count in 2**precision bytes.
+
+    Relative standard error is 1.04 / sqrt(2**precision): about 6.5% at
+    precision 8 (256 bytes) and 1.6% at precision 12 (4 KB). Small counts
+    use linear counting and are close to exact.
+    """
+
+    def __init__(self, precision: int = 8):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+    def add(self, item: str):
+        h = hash64(item)
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        # Position of the leftmost 1-bit in the remaining bits
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def copy(self) -> "HyperLogLog":
+        clone = HyperLogLog(self.precision)
+        clone.registers = bytearray(self.registers)
+        return clone
+
+    def count(self) -> int:
+        m = self.m
+        if m == 16:
+            alpha = 0.673
+        elif m == 32:
+            alpha = 0.697
+        elif m == 64:
+            alpha = 0.709
+        else:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def merge(self, other: "HyperLogLog"):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches of different precision")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def memory_bytes(self) -> int:
+        return len(self.registers)
+
+
+class CountMinSketch:
+    """Weighted frequency estimates in ``depth`` rows of ``width`` counters.
+
+    Estimates never undercount. With probability 1 - e**-depth, the
+    overestimate is at most (e / width) * total weight: about 0.13% of the
+    total at width 2048, with 98% confidence at depth 4.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.rows = [array("d", bytes(8 * width)) for _ in range(depth)]
+        self.total = 0.0
+
+    @property
+    def error_bound(self) -> float:
+        return math.e / self.width * self.total
+
+    def _indexes(self, item: str):
+        # Double hashing: one 64-bit hash yields all row indexes
+        h = hash64(item)
+        h1, h2 = h & 0xFFFFFFFF, h >> 32
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, item: str, weight: float = 1.0):
+        for row, i in zip(self.rows, self._indexes(item)):
+            row[i] += weight
+        self.total += weight
+
+    def estimate(self, item: str) -> float:
+        return min(row[i] for row, i in zip(self.rows, self._indexes(item)))
+
+    def merge(self, other: "CountMinSketch"):
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge sketches of different shape")
+        for row, other_row in zip(self.rows, other.rows):
+            for i, value in enumerate(other_row):
+                row[i] += value
+        self.total += other.total
+
+    def memory_bytes(self) -> int:
+        return 8 * self.width * self.depth
+
+
+class SpaceSaving:
+    """Top-k heavy hitters by weight in ``capacity`` counters.
+
+    Every item whose true weight exceeds total / capacity is guaranteed to be
+    tracked. Reported weights overestimate by at most the item's ``error``,
+    which is itself at most total / capacity.
+    """
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self.counts: dict[str, float] = {}
+        self.errors: dict[str, float] = {}
+        self.total = 0.0
+
+    def add(self, item: str, weight: float = 1.0):
+        self.total += weight
+        if item in self.counts:
+            self.counts[item] += weight
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[item] = weight
+            self.errors[item] = 0.0
+            return
+        # Replace the smallest counter; the newcomer inherits its count as error
+        victim = min(self.counts, key=self.counts.get)
+        floor = self.counts.pop(victim)
+        del self.errors[victim]
+        self.counts[item] = floor + weight
+        self.errors[item] = floor
+
+    def top(self, n: int = 10) -> list[tuple[str, float, float]]:
+        """Returns up to ``n`` (item, weight, max overestimate) tuples, heaviest first."""
+        items = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:n]
+        return [(item, weight, self.errors[item]) for item, weight in items]
+
+
+class TumblingWindow:
+    """One sketch per fixed, non-overlapping window; a new window starts from an empty sketch.
+
+    Windows only move forward: an event late enough to belong to a window
+    that has already closed gets no sketch and is dropped.
+    """
+
+    def __init__(self, width: timedelta, factory):
+        self.width = width
+        self.factory = factory
+        self.id = None
+        self.sketch = None
+
+    def current(self, ts: datetime):
+        """Sketch of the window containing ``ts``, or None if that window has closed."""
+        wid = window_id(ts, self.width)
+        if self.id is None or wid > self.id:
+            self.id, self.sketch = wid, self.factory()
+        return self.sketch if wid == self.id else None
+
+
+class StreamSketches:
+    """Risk signals maintained incrementally at ingest, in memory bounded by configuration.
+
+    - distinct merchant categories per account (HyperLogLog per account and window)
+    - distinct accounts per ~11 km location cell (HyperLogLog per cell and window)
+    - flagged volume per account (Count-Min for any account, Space-Saving for the top k)
+
+    Per-key sketches live in an LRU capped at SKETCH_MAX_KEYS, so quiet keys are
+    evicted instead of growing memory. State is per process; all sketches merge
+    if workers ever need to be combined.
+    """
+
+    def __init__(self, window: timedelta | None = None, precision: int | None = None,
+                 max_keys: int | None = None, top_k: int | None = None,
+                 cms_width: int | None = None, cms_depth: int | None = None):
+        self.window = window or timedelta(minutes=settings.SKETCH_WINDOW_MINUTES)
+        self.precision = precision or settings.SKETCH_HLL_PRECISION
+        self._ttl = 2 * self.window.total_seconds()
+        self._keyed = MemoryCache(max_entries=max_keys or settings.SKETCH_MAX_KEYS)
+        self._top = TumblingWindow(self.window, lambda: SpaceSaving(top_k or settings.SKETCH_TOP_K))
+        self._volume = TumblingWindow(self.window, lambda: CountMinSketch(
+            cms_width or settings.SKETCH_CMS_WIDTH, cms_depth or settings.SKETCH_CMS_DEPTH
+        ))
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def location_cell(lat: float, lon: float) -> str:
+        return f"{round(lat, 1)}:{round(lon, 1)}"
+
+    def _hll(self, kind: str, key: str, ts: datetime, create: bool) -> HyperLogLog | None:
+        cache_key = f"{kind}:{window_id(ts, self.window)}:{key}"
+        sketch = self._keyed.get(cache_key)
+        if sketch is None and create:
+            sketch = HyperLogLog(self.precision)
+            self._keyed.set(cache_key, sketch, self._ttl)
+        return sketch
+
+    def observe(self, account_id: str, merchant_category: str, lat: float | None, lon: float | None,
+                ts: datetime, merchants: bool = True):
+        """Adds the transaction; ``merchants=False`` skips the per-account sketch when no rule reads it."""
+        with self._lock:
+            if merchants:
+                self._hll("merchants", account_id, ts, create=True).add(merchant_category)
+            if lat is not None and lon is not None:
+                self._hll("cell", self.location_cell(lat, lon), ts, create=True).add(account_id)
+
+    def record_flagged(self, account_id: str, amount: float, ts: datetime):
+        # Called after commit, so events can arrive slightly out of order at a window boundary
+        with self._lock:
+            for window in (self._top, self._volume):
+                sketch = window.current(ts)
+                if sketch is not None:
+                    sketch.add(account_id, amount)
+
+    def distinct_merchants_with(self, account_id: str, merchant_category: str, ts: datetime) -> int:
+        """Distinct merchant categories this window if the transaction were added, without adding it.
+
+        Lets the rules see a transaction that has not committed yet; ``observe`` records it after commit.
+        """
+        with self._lock:
+            current = self._hll("merchants", account_id, ts, create=False)
+            sketch = current.copy() if current else HyperLogLog(self.precision)
+        sketch.add(merchant_category)
+        return sketch.count()
+
+    def distinct_merchants(self, account_id: str, ts: datetime) -> int:
+        with self._lock:
+            sketch = self._hll("merchants", account_id, ts, create=False)
+            return sketch.count() if sketch else 0
+
+    def distinct_accounts_in_cell(self, lat: float, lon: float, ts: datetime) -> int:
+        with self._lock:
+            sketch = self._hll("cell", self.location_cell(lat, lon), ts, create=False)
+            return sketch.count() if sketch else 0
+
+    def window_start(self, ts: datetime) -> datetime:
+        return window_start(window_id(ts, self.window), self.window)
+
+    @property
+    def window_minutes(self) -> int:
+        return int(self.window.total_seconds() // 60)
+
+    @property
+    def relative_error(self) -> float:
+        return round(1.04 / math.sqrt(1 << self.precision), 4)
+
+    def flagged_volume(self, account_id: str, ts: datetime) -> tuple[float, float]:
+        """Estimated flagged volume this window and the Count-Min error bound on it."""
+        with self._lock:
+            volume = self._volume.current(ts)
+            return (volume.estimate(account_id), volume.error_bound) if volume else (0.0, 0.0)
+
+    def top_risk_accounts(self, ts: datetime, limit: int = 10) -> dict:
+        with self._lock:
+            top = self._top.current(ts) or SpaceSaving(0)
+            return {
+                "window_start": self.window_start(ts),
+                "window_minutes": self.window_minutes,
+                "total_flagged_volume": top.total,
+                "accounts": [
+                    {"account_id": account, "flagged_volume": volume, "max_overestimate": error}
+                    for account, volume, error in top.top(limit)
+                ],
+            }
+
+    def stats(self) -> dict:
+        return {
+            "keyed_sketches": len(self._keyed),
+            "hll_bytes": 1 << self.precision,
+            "hll_relative_error": self.relative_error,
+            "max_keys": self._keyed.max_entries,
+        }
+
+
+stream_sketches = StreamSketches()
@@ -0,0 +1,73 @@
+import sys
+import os
+import json
+import time
+from datetime import datetime, timedelta
+
+# Ensure we can import app modules
+sys.path.append(os.getcwd())
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.base import Base
+from app.models.transaction import Transaction
+from app.schemas.transaction import TransactionResponse
+from app.api.v1.endpoints.transactions import TRANSACTION_COLUMNS
+from app.core.responses import dumps, iter_ndjson, orjson
+
+ROWS = 20000
+PAGE = 1000
+REPEAT = 5
+
+def seed(db):
+    start = datetime.utcnow()
+    db.add_all([
+        Transaction(
+            id=f"bench_{i}", account_id=f"acc_{i % 500}", amount=10.0 + i % 700,
+            currency="USD", merchant_category=["retail", "food", "travel"][i % 3],
+            location_lat=12.9 + i % 10, location_lon=77.5, channel="card",
+            timestamp=start - timedelta(seconds=i), is_flagged=i % 20 == 0, risk_score=i % 100,
+        )
+        for i in range(ROWS)
+    ])
+    db.commit()
+
+def baseline(db):
+    # What the endpoint used to do: full ORM objects, from_attributes validation, jsonable_encoder
+    rows = db.query(Transaction).order_by(Transaction.timestamp.desc()).limit(PAGE).all()
+    models = [TransactionResponse.model_validate(r) for r in rows]
+    return json.dumps(jsonable_encoder(models)).encode("utf-8")
+
+def fast_path(db):
+    rows = db.query(*TRANSACTION_COLUMNS).order_by(Transaction.timestamp.desc()).limit(PAGE).all()
+    return dumps([row._asdict() for row in rows])
+
+def ndjson(db):
+    query = db.query(*TRANSACTION_COLUMNS).order_by(Transaction.timestamp.desc())
+    return sum(len(chunk) for chunk in iter_ndjson(row._asdict() for row in query.yield_per(PAGE)))
+
+def measure(label, fn, db, rows_per_call):
+    db.expunge_all()
+    fn(db) # Warm-up
+    best = float("inf")
+    for _ in range(REPEAT):
+        db.expunge_all()
+        start = time.perf_counter()
+        fn(db)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<40} {rows_per_call / best:>12,.0f} rows/s")
+    return rows_per_call / best
+
+if __name__ == "__main__":
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    seed(db)
+
+    print(f"⏱️ Serializing a {PAGE}-row page (best of {REPEAT}), encoder: {'orjson' if orjson else 'json'}")
+    before = measure("ORM + from_attributes + jsonable_encoder", baseline, db, PAGE)
+    after = measure("column query + fast encoder", fast_path, db, PAGE)
+    print(f"Speed-up: {after / before:.1f}x")
+    measure(f"NDJSON stream ({ROWS} rows)", ndjson, db, ROWS)
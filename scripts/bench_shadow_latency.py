@@ -0,0 +1,77 @@
+import sys
+import os
+import argparse
+import statistics
+import tempfile
+import time
+
+# Ensure we can import app modules
+sys.path.append(os.getcwd())
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.base import Base
+from app.models import transaction, alert, account_profile, label, shadow_score  # noqa: F401
+from app.schemas.transaction import TransactionCreate
+from app.services.fraud_detector import FraudDetector
+from app.services.model_registry import registry, ScoringModel
+from app.services.shadow_scoring import ShadowScorer
+import app.services.fraud_detector as fraud_detector
+
+def run(session_factory, count: int, prefix: str) -> list[float]:
+    latencies = []
+    for i in range(count):
+        db = session_factory()
+        try:
+            start = time.perf_counter()
+            FraudDetector(db).process_transaction(TransactionCreate(
+                id=f"{prefix}_{i}", account_id=f"acc_{i % 200}", amount=10.0 + i % 500,
+                merchant_category=["retail", "food", "travel"][i % 3], channel="card",
+            ))
+            latencies.append((time.perf_counter() - start) * 1000)
+        finally:
+            db.close()
+    return latencies
+
+def summary(latencies: list[float]) -> str:
+    ordered = sorted(latencies)
+    return f"p50 {statistics.median(ordered):6.2f} ms   p99 {ordered[int(len(ordered) * 0.99) - 1]:6.2f} ms"
+
+def main():
+    parser = argparse.ArgumentParser(description="Champion ingest latency with and without shadow challengers")
+    parser.add_argument("--count", type=int, default=400)
+    args = parser.parse_args()
+
+    registry.load()
+    if not registry.champion:
+        print("⚠️ No champion model found; nothing to compare.")
+        return
+    champion = registry.champion
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+
+        # Warm up caches and the SQLite file before measuring
+        run(session_factory, 50, "warm")
+        print(f"🏁 {args.count} sequential ingests per mode")
+        print(f"   no challenger:           {summary(run(session_factory, args.count, 'base'))}")
+
+        registry.challengers = [ScoringModel("challenger", champion.estimator, champion.label_encoder)]
+        for label, out_of_process in (("batched, in-process", False), ("batched, worker process", True)):
+            scorer = ShadowScorer(session_factory=session_factory, out_of_process=out_of_process)
+            fraud_detector.shadow_scorer = scorer
+            # Start the flusher (and worker process) outside the measured window
+            run(session_factory, 10, f"warm_{out_of_process}")
+            scorer.drain(timeout=60)
+            latencies = run(session_factory, args.count, f"shadow_{out_of_process}")
+            scorer.drain(timeout=60)
+            scorer.shutdown()
+            print(f"   challenger, {label}: {summary(latencies)}")
+        registry.challengers = []
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import sys
+import os
+import argparse
+import math
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# Ensure we can import app modules
+sys.path.append(os.getcwd())
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.services.txn_window import TransactionWindow, WindowStats
+
+CATEGORIES = ["retail", "food", "travel", "electronics", "luxury"]
+
+def generate(entries: int, accounts: int, seed: int = 42):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    step = 24 * 3600 / entries
+    for i in range(entries):
+        yield (
+            f"acc_{rng.randrange(accounts)}", start + timedelta(seconds=i * step),
+            round(rng.uniform(1, 2000), 2), CATEGORIES[i % len(CATEGORIES)],
+            12.9 + rng.random(), 77.5 + rng.random(),
+        )
+
+def measure(build):
+    """Returns (result, bytes allocated and still held, seconds)."""
+    tracemalloc.start()
+    began = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - began
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, held, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory per entry and query speed of the transaction window")
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--accounts", type=int, default=100_000)
+    parser.add_argument("--shards", type=int, default=4)
+    args = parser.parse_args()
+
+    rows = list(generate(args.entries, args.accounts))
+    print(f"📦 {args.entries:,} transactions over 24h for {args.accounts:,} accounts")
+
+    # Baseline: what keeping recent history in Python objects costs
+    def build_tuples():
+        history = {}
+        for account_id, ts, amount, category, lat, lon in rows:
+            # Fresh objects, as they would arrive from requests
+            history.setdefault(account_id, []).append((str(account_id), ts + timedelta(0), amount + 0.0, str(category), lat + 0.0, lon + 0.0))
+        return history
+    history, tuple_bytes, _ = measure(build_tuples)
+
+    def build_window():
+        window = TransactionWindow(capacity=args.entries, shards=args.shards)
+        for row in rows:
+            window.append(*row)
+        return window
+    window, window_bytes, fill_seconds = measure(build_window)
+
+    print(f"   tuples per account:  {tuple_bytes / args.entries:>8.1f} bytes/entry")
+    print(f"   ring buffers:        {window_bytes / args.entries:>8.1f} bytes/entry "
+          f"({window.memory_bytes() / args.entries:.0f} packed + interned ids)")
+    print(f"   append:              {args.entries / fill_seconds:>8,.0f} entries/s")
+
+    now = rows[-1][1]
+    sample = [f"acc_{i}" for i in range(0, args.accounts, max(args.accounts // 1000, 1))]
+    everyone = [f"acc_{i}" for i in range(args.accounts)]
+    # Each query scans whole shards, so it pays off when many accounts are asked at once
+    for accounts, minutes in ((sample, 5), (sample, 60), (sample, 24 * 60), (everyone, 60), (everyone, 24 * 60)):
+        began = time.perf_counter()
+        window.stats(accounts, now, timedelta(minutes=minutes))
+        vectorized = time.perf_counter() - began
+
+        began = time.perf_counter()
+        since = now - timedelta(minutes=minutes)
+        # Same output as the window: count, sum and std per account
+        looped_stats = {}
+        for account_id in accounts:
+            amounts = [t[2] for t in history.get(account_id, []) if since < t[1] <= now]
+            if amounts:
+                mean = sum(amounts) / len(amounts)
+                std = math.sqrt(max(sum(a * a for a in amounts) / len(amounts) - mean * mean, 0.0))
+                looped_stats[account_id] = WindowStats(len(amounts), sum(amounts), std)
+        looped = time.perf_counter() - began
+        print(f"   stats for {len(accounts):>7,} accounts over {minutes:>4} min: "
+              f"{vectorized * 1000:>7.1f} ms vectorized, {looped * 1000:>7.1f} ms Python loop")
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,9 @@ from app.db.base import Base
 from app.db.session import engine
 from app.models.transaction import Transaction
 from app.models.alert import Alert
+from app.models.shadow_score import ShadowScore
+from app.models.label import TransactionLabel, ModelTrainingRun
+from app.models.account_profile import AccountProfile
 
 def init_db():
     print("Creating database tables...")
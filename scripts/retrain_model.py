@@ -0,0 +1,27 @@
+import sys
+import os
+
+# Ensure we can import app modules
+sys.path.append(os.getcwd())
+
+from app.db.session import SessionLocal
+from app.services.retraining import retrain_incremental
+
+def retrain():
+    print("🚀 Starting incremental retraining...")
+    db = SessionLocal()
+    try:
+        run = retrain_incremental(db)
+    finally:
+        db.close()
+
+    if run is None:
+        return
+
+    print(f"📊 New transactions: {run.new_transactions}, new labels: {run.new_labels}")
+    print(f"🧠 Trained on a sample of {run.sample_size} rows")
+    print(f"✅ Model saved as {run.model_file} (version {run.version})")
+    print("👉 Add it to CHALLENGER_MODELS to shadow-test it before promoting it to CHAMPION_MODEL.")
+
+if __name__ == "__main__":
+    retrain()
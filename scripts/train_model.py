@@ -1,15 +1,28 @@
 import sys
 import os
 import joblib
+import numpy as np
 import pandas as pd
 from sqlalchemy import create_engine
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import LabelEncoder
 from app.core.config import settings
+from app.services.calibration import fit_calibration, apply_calibration
 
 # Ensure we can import app modules
 sys.path.append(os.getcwd())
 
+# Typical ticket size per category for the demo data, in USD
+MOCK_CATEGORIES = {"food": 50.0, "retail": 80.0, "travel": 300.0, "electronics": 400.0, "luxury": 1500.0}
+
+def mock_transactions(n: int = 2000, seed: int = 42) -> pd.DataFrame:
+    """Everyday traffic to train a first model on while the database is still empty."""
+    rng = np.random.default_rng(seed)
+    categories = rng.choice(list(MOCK_CATEGORIES), size=n, p=[0.35, 0.3, 0.15, 0.12, 0.08])
+    typical = np.array([MOCK_CATEGORIES[c] for c in categories])
+    amounts = np.round(rng.lognormal(np.log(typical), 0.9), 2)
+    return pd.DataFrame({"amount": amounts, "merchant_category": categories})
+
 def train_model():
     print("🚀 Starting Model Training...")
     
@@ -28,11 +41,8 @@ def train_model():
     
     if len(df) < 10:
         print("⚠️ Not enough data to train (need > 10 transactions). using mock data for demo.")
-        # Create dummy data for initial training if DB is empty
-        df = pd.DataFrame({
-            'amount': [10.0, 20.0, 15.0, 100.0, 50.0, 12.0, 25.0, 18.0, 22.0, 90.0, 1500.0, 5000.0],
-            'merchant_category': ['retail', 'food', 'retail', 'travel', 'retail', 'food', 'retail', 'food', 'retail', 'electronics', 'luxury', 'luxury']
-        })
+        # Create dummy data for initial training if DB is empty; enough rows for the calibration quantiles
+        df = mock_transactions()
 
     # 3. Preprocessing
     print("🔧 Preprocessing features...")
@@ -48,12 +58,18 @@ def train_model():
     print("🧠 Training Isolation Forest...")
     clf = IsolationForest(contamination=0.05, random_state=42)
     clf.fit(X)
+
+    # Map raw scores to a 0-100 risk, fitted on the training distribution
+    calibration = fit_calibration(clf.score_samples(X), clf.offset_)
     
     # 5. Save Artifacts
     os.makedirs("app/ml_models", exist_ok=True)
     
-    # Save the Model
-    joblib.dump(clf, "app/ml_models/isolation_forest.pkl")
+    # Save the Model, bundled with its encoder and calibration table
+    joblib.dump(
+        {"model": clf, "label_encoder": le, "calibration": calibration},
+        "app/ml_models/isolation_forest.pkl",
+    )
     
     # Save the Label Encoder (to encode future categories)
     joblib.dump(le, "app/ml_models/label_encoder.pkl")
@@ -65,8 +81,9 @@ def train_model():
     test_normal = [[25.0, le.transform(['retail'])[0]]]
     test_anomaly = [[5000.0, le.transform(['luxury'])[0]]] if 'luxury' in le.classes_ else [[99999.0, 0]]
     
-    print(f"Test Normal ($25 Retail): {clf.decision_function(test_normal)[0]:.4f} (Pos is safe)")
-    print(f"Test Anomaly ($5k): {clf.decision_function(test_anomaly)[0]:.4f} (Neg is anomaly)")
+    for label, X_test in (("Test Normal ($25 Retail)", test_normal), ("Test Anomaly ($5k)", test_anomaly)):
+        risk = apply_calibration(clf.score_samples(X_test), calibration)[0]
+        print(f"{label}: risk {risk:.1f} (ML rule fires above {settings.ML_RISK_THRESHOLD})")
 
 if __name__ == "__main__":
     train_model()
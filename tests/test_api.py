@@ -2,24 +2,45 @@ import sys
 import os
 sys.path.append(os.getcwd())
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, select
 from sqlalchemy.orm import sessionmaker
 from app.main import app
-from app.db.session import get_db
+from app.db.session import get_db, use_sqlite_wal
 from app.db.base import Base
 from app.models.transaction import Transaction
 from app.models.alert import Alert
+from app.models.label import TransactionLabel
+from app.models.account_profile import AccountProfile
+from app.schemas.transaction import TransactionResponse
+from app.services.model_registry import registry, ScoringModel, ModelRegistry
+from app.services.shadow_scoring import shadow_scorer
+from app.services.sketches import stream_sketches
+from app.services.txn_window import txn_window
+from app.services.retraining import retrain_incremental
+from app.services.backtest import run_backtest
+from app.services.exporter import iter_partitions
+from app.services.fraud_detector import RuleConfig, FraudDetector
+from app.services.account_profiles import ProfileState, profiles
+from app.services.ingest_shards import ShardedIngestor, ingestor
+from app.schemas.transaction import TransactionCreate
+from app.core.config import settings
 import pytest
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 
 # Use SQLite for testing to avoid Postgres dependency issues during verification
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 
-if os.path.exists("./test.db"):
-    os.remove("./test.db")
+for path in ("./test.db", "./test.db-wal", "./test.db-shm"):
+    if os.path.exists(path):
+        os.remove(path)
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
+use_sqlite_wal(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base.metadata.create_all(bind=engine)
@@ -32,6 +53,8 @@ def override_get_db():
         db.close()
 
 app.dependency_overrides[get_db] = override_get_db
+shadow_scorer.session_factory = TestingSessionLocal
+ingestor.session_factory = TestingSessionLocal
 
 client = TestClient(app)
 
@@ -40,6 +63,15 @@ def test_read_main():
     assert response.status_code == 200
     assert response.json() == {"message": "Welcome to the Fraud Detection System API"}
 
+def test_health_ready_after_warm_up():
+    assert client.get("/health/live").status_code == 200
+    # Without the lifespan running, the worker must not report ready
+    assert client.get("/health/ready").status_code == 503
+    with TestClient(app) as started:
+        response = started.get("/health/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+
 def test_create_transaction_clean():
     response = client.post(
         "/api/v1/transactions/",
@@ -77,6 +109,292 @@ def test_create_transaction_high_amount():
     assert len(alerts) > 0
     assert alerts[-1]["transaction_id"] == "trans2"
 
+def test_account_profile():
+    for i, amount in enumerate([100.0, 200.0, 300.0]):
+        client.post(
+            "/api/v1/transactions/",
+            json={"id": f"profile_{i}", "account_id": "acc_profile", "amount": amount,
+                  "merchant_category": "food", "channel": "card",
+                  "location_lat": 12.9 + i, "location_lon": 77.6},
+        )
+
+    response = client.get("/api/v1/accounts/acc_profile/profile")
+    assert response.status_code == 200
+    profile = response.json()
+    assert profile["txn_count"] == 3
+    assert profile["avg_amount"] == 200.0
+    assert profile["std_amount"] == pytest.approx(81.65, abs=0.01)
+    assert profile["last_lat"] == pytest.approx(14.9)
+    assert profile["velocity_5m"] == 3
+    assert profile["recent_amount_5m"] == 600.0
+    assert profile["flagged_count"] == 0
+
+    # Written through to the profile table
+    db = TestingSessionLocal()
+    try:
+        assert db.get(AccountProfile, "acc_profile").txn_count == 3
+        # Recent amounts survive a reload from the table
+        assert profiles._load(db, "acc_profile").recent_amount(datetime.utcnow()) == 600.0
+    finally:
+        db.close()
+
+    assert client.get("/api/v1/accounts/nobody/profile").status_code == 404
+
+def test_profile_writes_add_up_under_concurrency():
+    # Two writers starting from the same stale snapshot both land
+    before = ProfileState(account_id="acc_stale")
+    after = before.updated_with(10.0, None, None, datetime.utcnow(), False)
+    for _ in range(2):
+        db = TestingSessionLocal()
+        try:
+            profiles.write(db, before, after)
+            db.commit()
+        finally:
+            db.close()
+
+    def process(i):
+        db = TestingSessionLocal()
+        try:
+            FraudDetector(db).process_transaction(TransactionCreate(
+                id=f"locked_{i}", account_id="acc_locked", amount=10.0,
+                merchant_category="food", channel="card",
+            ))
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(process, range(16)))
+
+    db = TestingSessionLocal()
+    try:
+        stale = db.get(AccountProfile, "acc_stale")
+        assert (stale.txn_count, stale.total_amount) == (2, 20.0)
+        assert db.get(AccountProfile, "acc_locked").txn_count == 16
+        assert profiles.get(db, "acc_locked").txn_count == 16
+    finally:
+        db.close()
+
+def test_merchant_spread_and_top_risk_accounts():
+    categories = ["food", "retail", "travel", "electronics", "luxury"]
+    # Off by default
+    for i, category in enumerate(categories):
+        client.post(
+            "/api/v1/transactions/",
+            json={"id": f"spread_off_{i}", "account_id": "acc_spread_off", "amount": 50.0,
+                  "merchant_category": category, "channel": "card"},
+        )
+    alerts = client.get("/api/v1/alerts/", params={"limit": 1000}).json()
+    assert not any("Merchant Spread" in a["rule_triggered"] for a in alerts)
+
+    db = TestingSessionLocal()
+    try:
+        detector = FraudDetector(db, RuleConfig(merchant_spread_count=5))
+        for i, category in enumerate(categories[:4]):
+            detector.process_transaction(TransactionCreate(
+                id=f"spread_{i}", account_id="acc_spread", amount=50.0,
+                merchant_category=category, channel="card",
+            ))
+        # A failed insert never reaches the sketches
+        with pytest.raises(Exception):
+            detector.process_transaction(TransactionCreate(
+                id="spread_0", account_id="acc_spread", amount=50.0,
+                merchant_category="luxury", channel="card",
+            ))
+        db.rollback()
+        assert stream_sketches.distinct_merchants("acc_spread", datetime.utcnow()) == 4
+
+        transaction, alert = detector.process_transaction(TransactionCreate(
+            id="spread_4", account_id="acc_spread", amount=50.0,
+            merchant_category="luxury", channel="card",
+        ))
+        assert transaction.is_flagged
+        assert "Merchant Spread" in alert.rule_triggered
+    finally:
+        db.close()
+
+    response = client.get("/api/v1/analytics/top-risk-accounts", params={"limit": 100})
+    assert response.status_code == 200
+    ranked = {a["account_id"]: a["flagged_volume"] for a in response.json()["accounts"]}
+    # Only the flagged transactions count towards flagged volume
+    assert ranked["acc_spread"] == pytest.approx(100.0)
+
+    response = client.get("/api/v1/analytics/accounts/acc_spread/flagged-volume")
+    assert response.status_code == 200
+    volume = response.json()
+    assert 100.0 <= volume["flagged_volume"] <= 100.0 + volume["max_overestimate"]
+
+    # acc_profile posted from this cell earlier
+    response = client.get("/api/v1/analytics/location-cell", params={"lat": 12.9, "lon": 77.6})
+    assert response.status_code == 200
+    assert response.json()["distinct_accounts"] >= 1
+
+def test_account_window_stats(monkeypatch):
+    monkeypatch.setattr(settings, "TXN_WINDOW_CAPACITY", 1000)
+    for i, amount in enumerate([40.0, 60.0]):
+        client.post(
+            "/api/v1/transactions/",
+            json={"id": f"window_{i}", "account_id": "acc_window", "amount": amount,
+                  "merchant_category": "food", "channel": "card"},
+        )
+
+    response = client.get("/api/v1/accounts/acc_window/window", params={"minutes": 5})
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["count"] == 2
+    assert stats["avg_amount"] == 50.0
+    assert stats["std_amount"] == 10.0
+
+    monkeypatch.setattr(settings, "TXN_WINDOW_CAPACITY", 0)
+    assert client.get("/api/v1/accounts/acc_window/window").status_code == 503
+
+    # The transaction has committed by then, so a window failure doesn't fail the request
+    def broken_append(*args, **kwargs):
+        raise OverflowError("window full")
+    monkeypatch.setattr(txn_window, "append", broken_append)
+    response = client.post(
+        "/api/v1/transactions/",
+        json={"id": "window_broken", "account_id": "acc_window", "amount": 50.0,
+              "merchant_category": "food", "channel": "card"},
+    )
+    assert response.status_code == 200
+
+def test_backtest_replay_with_candidate_rules():
+    current = run_backtest(SQLALCHEMY_DATABASE_URL, RuleConfig())
+    assert current["rows"] > 0
+    assert all(hit["delta"] == 0 for hit in current["rule_hits"])
+    assert current["candidate_flagged"] == current["baseline_flagged"]
+
+    # Raising the high-amount limit must drop those hits and never add flags
+    looser = run_backtest(SQLALCHEMY_DATABASE_URL, RuleConfig(high_amount=1_000_000))
+    high = next(h for h in looser["rule_hits"] if h["rule"] == "High Amount Transaction")
+    assert high["candidate"] == 0 and high["delta"] == -high["baseline"]
+    assert looser["candidate_flagged"] <= looser["baseline_flagged"]
+
+    # Sharded replay is deterministic and matches the single-shard run
+    sharded = run_backtest(SQLALCHEMY_DATABASE_URL, RuleConfig(high_amount=1_000_000), shards=2)
+    assert sharded["shards"] == 2
+    assert {k: v for k, v in sharded.items() if k != "shards"} == {k: v for k, v in looser.items() if k != "shards"}
+
+def test_sharded_ingestion_keeps_velocity_exact():
+    burst = 20
+
+    async def ingest_concurrently():
+        sharded = ShardedIngestor(shards=4, session_factory=TestingSessionLocal)
+        await sharded.start()
+
+        async def ingest(account_id, i):
+            _, alert = await sharded.submit(
+                TransactionCreate(id=f"{account_id}_{i}", account_id=account_id, amount=20.0,
+                                  merchant_category="food", channel="card"),
+            )
+            return alert is not None and "Rapid Transactions" in alert.rule_triggered
+
+        try:
+            # Two accounts interleaved, all requests in flight at once
+            return await asyncio.gather(*[
+                ingest(account_id, i) for i in range(burst) for account_id in ("acc_burst_a", "acc_burst_b")
+            ])
+        finally:
+            await sharded.stop()
+
+    rapid = asyncio.run(ingest_concurrently())
+    # The first 3 of each account are below the threshold, every later one must see its predecessors
+    assert sum(rapid) == 2 * (burst - 3)
+
+def post_burst(http, prefix, burst=20):
+    """Posts ``burst`` transactions for each of two accounts, all in flight at once over HTTP."""
+    accounts = (f"{prefix}_a", f"{prefix}_b")
+
+    def post(args):
+        account_id, i = args
+        return http.post(
+            "/api/v1/transactions/",
+            json={"id": f"{account_id}_{i}", "account_id": account_id, "amount": 20.0,
+                  "merchant_category": "food", "channel": "card"},
+        ).status_code
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        assert set(pool.map(post, [(a, i) for i in range(burst) for a in accounts])) == {200}
+
+    db = TestingSessionLocal()
+    try:
+        rapid = db.query(Alert).join(Transaction, Transaction.id == Alert.transaction_id).filter(
+            Transaction.account_id.in_(accounts), Alert.rule_triggered.like("%Rapid Transactions%")
+        ).count()
+        counts = [db.get(AccountProfile, a).txn_count for a in accounts]
+    finally:
+        db.close()
+    return rapid, counts
+
+def test_http_burst_inline_keeps_velocity_exact():
+    assert not ingestor.running
+    rapid, counts = post_burst(client, "acc_http_inline")
+    assert counts == [20, 20]
+    assert rapid == 2 * (20 - 3)
+
+def test_http_burst_sharded_keeps_velocity_exact(monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_SHARDS", 4)
+    with TestClient(app) as sharded_client:
+        assert ingestor.shards == 4
+        rapid, counts = post_burst(sharded_client, "acc_http_sharded")
+    assert counts == [20, 20]
+    assert rapid == 2 * (20 - 3)
+
+def test_list_transactions_fast_path():
+    response = client.get("/api/v1/transactions/?limit=5")
+    assert response.status_code == 200
+    rows = response.json()
+    assert 0 < len(rows) <= 5
+    # Same shape the response_model documents
+    for row in rows:
+        TransactionResponse(**row)
+
+    response = client.get("/api/v1/transactions/?limit=5&format=ndjson")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == rows
+
+def test_export_transactions_streams_formats():
+    response = client.get("/api/v1/transactions/export?format=csv&account_id=acc1")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.strip().splitlines()
+    assert lines[0].startswith("id,account_id,amount")
+    assert {line.split(",")[0] for line in lines[1:]} == {"trans1", "trans2"}
+
+    response = client.get("/api/v1/transactions/export?format=ndjson&flagged=true")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows and all(r["is_flagged"] for r in rows)
+
+    response = client.get("/api/v1/alerts/export?format=ndjson&account_id=acc1")
+    assert [r["transaction_id"] for r in map(json.loads, response.text.splitlines())] == ["trans2"]
+
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        return
+    import io
+    response = client.get("/api/v1/transactions/export?format=parquet")
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.num_rows == len(client.get("/api/v1/transactions/?limit=1000").json())
+
+def test_ingest_commits_while_export_streams():
+    reader = TestingSessionLocal()
+    try:
+        # A download in progress: first chunk read, cursor still open
+        partitions = iter_partitions(reader, select(Transaction.id).order_by(Transaction.timestamp), 1)
+        assert next(partitions)
+        response = client.post(
+            "/api/v1/transactions/",
+            json={"id": "during_export", "account_id": "acc_export", "amount": 10.0,
+                  "merchant_category": "food", "channel": "card"},
+        )
+        assert response.status_code == 200
+        assert next(partitions)
+    finally:
+        reader.close()
+
 def test_statistical_anomaly():
     # Helper to add history
     db = TestingSessionLocal()
@@ -114,6 +432,173 @@ def test_statistical_anomaly():
     latest_alert = next(a for a in alerts if a["transaction_id"] == "trans_anomaly")
     assert "Z-Score" in latest_alert["rule_triggered"]
 
+def test_bulk_alert_status():
+    for i in range(3):
+        client.post(
+            "/api/v1/transactions/",
+            json={
+                "id": f"triage_{i}",
+                "account_id": "acc_triage",
+                "amount": 25000.0,
+                "merchant_category": "jewelry",
+                "channel": "card"
+            },
+        )
+
+    response = client.post(
+        "/api/v1/alerts/bulk-status",
+        json={"account_id": "acc_triage", "new_status": "confirmed_fraud"},
+    )
+    assert response.status_code == 200
+    assert response.json()["updated"] == 3
+
+    # Already in the target status: nothing changes
+    response = client.post(
+        "/api/v1/alerts/bulk-status",
+        json={"account_id": "acc_triage", "status": "new", "new_status": "confirmed_fraud"},
+    )
+    assert response.json()["updated"] == 0
+
+    alerts = client.get("/api/v1/alerts/").json()
+    triaged = [a for a in alerts if a["transaction_id"].startswith("triage_")]
+    assert len(triaged) == 3
+    assert all(a["status"] == "confirmed_fraud" for a in triaged)
+
+    response = client.post("/api/v1/alerts/bulk-status", json={"new_status": "unknown"})
+    assert response.status_code == 422
+
+    # No filter matches the whole table, so it has to be asked for explicitly
+    for body in ({"new_status": "false_positive"}, {"new_status": "false_positive", "severity": ""}):
+        assert client.post("/api/v1/alerts/bulk-status", json=body).status_code == 422
+    assert all(a["status"] == "confirmed_fraud" for a in client.get("/api/v1/alerts/").json()
+               if a["transaction_id"].startswith("triage_"))
+
+    # LIKE wildcards in the rule filter are matched literally: "%" only hits rules with a
+    # literal percent sign (Z-Score), "_" hits nothing
+    before = client.get("/api/v1/alerts/", params={"limit": 1000}).json()
+    for rule in ("%", "_"):
+        expected = sum(1 for a in before if rule in a["rule_triggered"] and a["status"] != "read")
+        response = client.post("/api/v1/alerts/bulk-status", json={"rule": rule, "new_status": "read"})
+        assert response.status_code == 200
+        assert response.json()["updated"] == expected < len(before)
+    assert all(a["status"] == "confirmed_fraud" for a in client.get("/api/v1/alerts/").json()
+               if a["transaction_id"].startswith("triage_"))
+
+def test_incremental_retraining_from_labels(tmp_path):
+    response = client.post(
+        "/api/v1/alerts/bulk-status",
+        json={"account_id": "acc1", "new_status": "false_positive"},
+    )
+    assert response.status_code == 200
+
+    db = TestingSessionLocal()
+    try:
+        labels = db.query(TransactionLabel).all()
+        assert any(l.is_fraud for l in labels)      # acc_triage, confirmed earlier
+        assert any(not l.is_fraud for l in labels)  # acc1, cleared just now
+
+        first = retrain_incremental(db, model_dir=str(tmp_path))
+        assert first.version == 1
+        assert first.new_transactions == db.query(Transaction).count()
+        assert os.path.exists(tmp_path / first.model_file)
+        # The calibration table ships inside the bundle
+        loaded = ModelRegistry(model_dir=str(tmp_path), champion=first.model_file, challengers=[]).load().champion
+        assert loaded.calibration["risk"][0] == 100.0
+
+        # Nothing new since the watermark: no rescan, no new version
+        assert retrain_incremental(db, model_dir=str(tmp_path)) is None
+
+        client.post(
+            "/api/v1/transactions/",
+            json={"id": "retrain_new", "account_id": "acc_retrain", "amount": 42.0,
+                  "merchant_category": "food", "channel": "card"},
+        )
+        second = retrain_incremental(db, model_dir=str(tmp_path))
+        assert second.version == 2
+        assert second.new_transactions == 1
+        assert second.new_labels == 0
+
+        # Stamped before the watermark but committed after the run: still picked up, once
+        late = second.transaction_watermark - timedelta(seconds=30)
+        db.add(Transaction(id="retrain_late", account_id="acc_retrain", amount=43.0,
+                           merchant_category="food", channel="card", timestamp=late))
+        db.commit()
+        third = retrain_incremental(db, model_dir=str(tmp_path))
+        assert third.new_transactions == 1
+        assert third.transaction_watermark == second.transaction_watermark
+        assert retrain_incremental(db, model_dir=str(tmp_path)) is None
+    finally:
+        db.close()
+
+def test_mark_alerts_read_reports_count():
+    response = client.post("/api/v1/alerts/mark-read")
+    assert response.status_code == 200
+    assert response.json()["updated"] >= 0
+    assert not [a for a in client.get("/api/v1/alerts/").json() if a["status"] == "new"]
+
+def test_analytics_cache_etag_and_invalidation():
+    url = "/api/v1/analytics/fraud-by-category"
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    second = client.get(url)
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == first.json()
+
+    not_modified = client.get(url, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+
+    # A flagged write bumps the generation, so the next read recomputes
+    client.post(
+        "/api/v1/transactions/",
+        json={"id": "cache_bust", "account_id": "acc_cache", "amount": 50000.0,
+              "merchant_category": "cache_test", "channel": "card"},
+    )
+    third = client.get(url, headers={"If-None-Match": etag})
+    assert third.status_code == 200
+    assert third.headers["x-cache"] == "MISS"
+    assert {"category": "cache_test", "fraud_count": 1} in third.json()
+
+    stats = client.get("/api/v1/metrics/").json()["analytics_cache"]
+    assert stats["hits"] >= 2
+    assert stats["not_modified"] >= 1
+
+def test_shadow_scoring_report():
+    registry.load()
+    if not registry.champion:
+        pytest.skip("No champion model available")
+
+    # Challenger identical to the champion must agree on every transaction
+    champion = registry.champion
+    challenger = ScoringModel("challenger_test", champion.estimator, champion.label_encoder)
+    registry.challengers.append(challenger)
+    try:
+        for i, amount in enumerate([25.0, 80.0, 99999.0]):
+            response = client.post(
+                "/api/v1/transactions/",
+                json={
+                    "id": f"shadow_{i}",
+                    "account_id": "acc_shadow",
+                    "amount": amount,
+                    "merchant_category": "retail",
+                    "channel": "card"
+                },
+            )
+            assert response.status_code == 200
+        assert shadow_scorer.drain(timeout=10)
+    finally:
+        registry.challengers.remove(challenger)
+
+    response = client.get("/api/v1/models/shadow-report")
+    assert response.status_code == 200
+    report = response.json()
+    models = {m["model"]: m for m in report["models"]}
+    assert models["challenger_test"]["scored"] == 3
+    assert models["challenger_test"]["agreement_rate"] == 1.0
+    assert models["challenger_test"]["flag_rate_delta"] == 0.0
+    assert models[champion.name]["is_champion"] is True
+
 if __name__ == "__main__":
     import sys
     # Manually run tests if executed as script
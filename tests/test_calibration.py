@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+from datetime import datetime
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import LabelEncoder
+from app.services.account_profiles import ProfileState
+from app.services.calibration import fit_calibration, BOUNDARY_RISK
+from app.services.fraud_detector import RuleConfig, apply_rules, score_rules
+from app.services.model_registry import ScoringModel, ModelRegistry
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    rng = np.random.default_rng(5)
+    categories = np.array(["food", "retail", "travel"])
+    le = LabelEncoder().fit(categories)
+    amounts = np.concatenate([rng.lognormal(3, 0.6, 2000), rng.uniform(2000, 9000, 40)])
+    cats = rng.choice(categories, len(amounts))
+    X = np.column_stack([amounts, le.transform(cats)])
+    clf = IsolationForest(contamination=0.05, random_state=0).fit(X)
+    return clf, le, X, amounts.tolist(), cats.tolist()
+
+
+def test_calibrated_risk_is_monotone_and_bounded(fitted):
+    clf, _, X, _, _ = fitted
+    table = fit_calibration(clf.score_samples(X), clf.offset_)
+    assert table["raw"] == sorted(table["raw"])
+    assert all(a >= b for a, b in zip(table["risk"], table["risk"][1:]))
+    assert table["risk"][0] == 100.0 and table["risk"][-1] == 0.0
+
+
+@pytest.mark.parametrize("with_table", [True, False])
+def test_default_threshold_matches_predict(fitted, with_table):
+    clf, le, X, amounts, cats = fitted
+    # Without a stored table, the legacy fallback is anchored at the same boundary
+    table = fit_calibration(clf.score_samples(X), clf.offset_) if with_table else None
+    model = ScoringModel("iforest", clf, le, table)
+
+    risks = model.score_batch(amounts, cats)
+    assert all(0.0 <= r <= 100.0 for r in risks)
+    flagged = [r > BOUNDARY_RISK for r in risks]
+    assert flagged == [p == -1 for p in clf.predict(X)]
+    # Unlike predict(), risk keeps the ordering inside each side of the boundary
+    assert len({round(r, 3) for r in risks}) > 100
+
+
+def test_category_thresholds_without_retraining():
+    profile = ProfileState(account_id="acc")
+    now = datetime(2024, 1, 1)
+    rules = RuleConfig(ml_category_thresholds={"food": 75})
+
+    assert apply_rules(50.0, profile, now, 80.0, rules, category="retail") == []
+    triggered = apply_rules(50.0, profile, now, 80.0, rules, category="food")
+    assert triggered == ["ML Anomaly (Isolation Forest)"]
+    # The calibrated risk becomes the score, not a flat 88
+    assert score_rules(50.0, triggered, profile, rules, 80.0) == 80
+    assert apply_rules(50.0, profile, now, None, rules, category="food") == []
+
+    # Below the flag threshold a hit still flags
+    low = RuleConfig(ml_category_thresholds={"food": 30})
+    triggered = apply_rules(50.0, profile, now, 40.0, low, category="food")
+    assert score_rules(50.0, triggered, profile, low, 40.0) == low.flag_threshold + 1
+
+
+def test_shipped_model_has_a_fitted_table():
+    champion = ModelRegistry(challengers=[]).load().champion
+    assert champion is not None
+    # The linear fallback has three knots
+    assert len(champion.calibration["raw"]) > 3
+
+
+def test_bare_estimator_calibrated_from_training_sample(fitted, tmp_path):
+    clf, le, _, amounts, cats = fitted
+    joblib.dump(clf, tmp_path / "bare.pkl")
+    joblib.dump(le, tmp_path / "encoder.pkl")
+
+    def load():
+        return ModelRegistry(model_dir=str(tmp_path), champion="bare.pkl", challengers=[],
+                             label_encoder="encoder.pkl").load().champion
+
+    assert len(load().calibration["raw"]) == 3
+    rows = pd.DataFrame({"id": range(len(amounts)), "amount": amounts, "merchant_category": cats})
+    joblib.dump({"rows": rows, "seen": len(rows)}, tmp_path / "training_sample.pkl")
+    model = load()
+    assert model.calibration == fit_calibration(clf.score_samples(np.column_stack([amounts, le.transform(cats)])), clf.offset_)
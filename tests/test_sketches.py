@@ -0,0 +1,103 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+from datetime import datetime, timedelta
+import random
+from app.services.sketches import HyperLogLog, CountMinSketch, SpaceSaving, StreamSketches
+
+
+def test_hyperloglog_within_documented_error():
+    for true_count in (3, 1000, 50000):
+        hll = HyperLogLog(precision=10)
+        for i in range(true_count):
+            hll.add(f"merchant-{i}")
+            hll.add(f"merchant-{i}") # Duplicates must not count
+        # Three standard errors
+        assert abs(hll.count() - true_count) <= max(3 * hll.relative_error * true_count, 1)
+
+
+def test_hyperloglog_merge_equals_union():
+    a, b, union = HyperLogLog(10), HyperLogLog(10), HyperLogLog(10)
+    for i in range(3000):
+        (a if i % 2 else b).add(str(i))
+        union.add(str(i))
+    a.merge(b)
+    assert a.count() == union.count()
+
+
+def test_count_min_never_undercounts():
+    rng = random.Random(7)
+    cms = CountMinSketch(width=256, depth=4)
+    true = {}
+    for _ in range(20000):
+        key = f"acc-{int(rng.paretovariate(1.2)) % 2000}"
+        weight = rng.uniform(1, 100)
+        cms.add(key, weight)
+        true[key] = true.get(key, 0) + weight
+    over = [cms.estimate(k) - v for k, v in true.items()]
+    assert min(over) >= -1e-6
+    # Bound holds with probability 1 - e**-4 per key
+    assert sum(o > cms.error_bound for o in over) <= 0.05 * len(over)
+
+
+def test_space_saving_keeps_heavy_hitters():
+    rng = random.Random(3)
+    ss = SpaceSaving(capacity=20)
+    true = {}
+    for _ in range(5000):
+        key = f"noise-{rng.randrange(500)}"
+        ss.add(key, 1.0)
+        true[key] = true.get(key, 0) + 1.0
+    for heavy, weight in (("mule-1", 900.0), ("mule-2", 600.0)):
+        for _ in range(10):
+            ss.add(heavy, weight / 10)
+        true[heavy] = weight
+
+    top = ss.top(2)
+    assert [item for item, _, _ in top] == ["mule-1", "mule-2"]
+    for item, estimate, error in top:
+        assert true[item] <= estimate <= true[item] + error
+
+
+def test_stream_sketches_tumbling_window():
+    sketches = StreamSketches(window=timedelta(minutes=60), precision=8, max_keys=100, top_k=10)
+    t0 = datetime(2024, 1, 1, 10, 5)
+    for i, category in enumerate(["retail", "food", "travel", "food", "luxury"]):
+        sketches.observe("acc-1", category, 12.34, 56.78, t0 + timedelta(minutes=i))
+    assert sketches.distinct_merchants("acc-1", t0) == 4
+    # Off when no rule reads it; the cell sketch is still kept
+    sketches.observe("acc-2", "food", 12.34, 56.78, t0, merchants=False)
+    assert sketches.distinct_merchants("acc-2", t0) == 0
+    assert sketches.distinct_accounts_in_cell(12.31, 56.81, t0) == 2
+
+    sketches.record_flagged("acc-1", 500.0, t0)
+    sketches.record_flagged("acc-2", 2000.0, t0)
+    report = sketches.top_risk_accounts(t0)
+    assert [a["account_id"] for a in report["accounts"]] == ["acc-2", "acc-1"]
+    assert report["window_start"] == datetime(2024, 1, 1, 10, 0)
+
+    # Asking what a new category would do leaves the sketch as it was
+    assert sketches.distinct_merchants_with("acc-1", "electronics", t0) == 5
+    assert sketches.distinct_merchants("acc-1", t0) == 4
+
+    # The next window starts empty
+    later = t0 + timedelta(hours=1)
+    assert sketches.distinct_merchants("acc-1", later) == 0
+    assert sketches.top_risk_accounts(later)["accounts"] == []
+
+
+def test_late_events_dont_reset_the_window():
+    sketches = StreamSketches(window=timedelta(minutes=60), precision=8, max_keys=100, top_k=10)
+    boundary = datetime(2024, 1, 1, 11, 0)
+    sketches.record_flagged("acc-big", 50000.0, boundary + timedelta(seconds=1))
+    # Committed just after the boundary but stamped just before it: its window has closed
+    sketches.record_flagged("acc-late", 10.0, boundary - timedelta(seconds=1))
+    sketches.record_flagged("acc-small", 20.0, boundary + timedelta(seconds=1))
+
+    report = sketches.top_risk_accounts(boundary + timedelta(seconds=2))
+    assert [a["account_id"] for a in report["accounts"]] == ["acc-big", "acc-small"]
+    assert report["total_flagged_volume"] == 50020.0
+    assert sketches.flagged_volume("acc-big", boundary)[0] == 50000.0
+    # Asking about the closed window doesn't reopen it either
+    assert sketches.top_risk_accounts(boundary - timedelta(seconds=1))["accounts"] == []
+    assert sketches.flagged_volume("acc-big", boundary + timedelta(seconds=3))[0] == 50000.0
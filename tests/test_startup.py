@@ -0,0 +1,38 @@
+import sys
+import os
+import subprocess
+sys.path.append(os.getcwd())
+
+# Libraries that must only be imported lazily (lifespan hook, scripts), never by `import app.main`
+HEAVY_MODULES = {"numpy", "pandas", "sklearn", "scipy", "joblib", "pyarrow"}
+
+# Generous ceiling for the whole import; the per-module check above is the real guard
+IMPORT_BUDGET_US = int(os.environ.get("IMPORT_TIME_BUDGET_US", 3_000_000))
+
+def import_time_report(module: str = "app.main") -> list[tuple[int, int, str]]:
+    """Runs `python -X importtime -c "import <module>"` and returns (self_us, cumulative_us, name) rows."""
+    env = {**os.environ, "DATABASE_URL": os.environ.get("DATABASE_URL", "sqlite://")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, cwd=os.getcwd(),
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return rows
+
+def test_app_import_stays_lightweight():
+    rows = import_time_report()
+    imported = {name.strip().split(".")[0] for _, _, name in rows}
+    assert not HEAVY_MODULES & imported, f"Heavy modules imported at startup: {HEAVY_MODULES & imported}"
+
+    total_us = next(cumulative for _, cumulative, name in rows if name.strip() == "app.main")
+    print(f"\nimport app.main: {total_us / 1000:.1f} ms")
+    for _, cumulative, name in sorted(rows, key=lambda r: r[1], reverse=True)[:10]:
+        print(f"  {cumulative / 1000:>8.1f} ms  {name}")
+    assert total_us < IMPORT_BUDGET_US
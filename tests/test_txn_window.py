@@ -0,0 +1,83 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+from datetime import datetime, timedelta
+import math
+import random
+import pytest
+from app.services.txn_window import TransactionWindow, RingBuffer, OTHER_CATEGORY
+
+
+def expected_stats(rows, account_id, now, window):
+    amounts = [amount for acc, ts, amount in rows if acc == account_id and now - window < ts <= now]
+    if not amounts:
+        return 0, 0.0, 0.0
+    mean = sum(amounts) / len(amounts)
+    return len(amounts), sum(amounts), math.sqrt(sum((a - mean) ** 2 for a in amounts) / len(amounts))
+
+
+def test_window_stats_match_exact_aggregates():
+    rng = random.Random(11)
+    window = TransactionWindow(capacity=10000, shards=3)
+    now = datetime(2024, 1, 1, 12, 0)
+    rows = []
+    for i in range(3000):
+        account_id = f"acc-{rng.randrange(50)}"
+        ts = now - timedelta(seconds=rng.randrange(2 * 3600))
+        amount = round(rng.uniform(1, 500), 2)
+        rows.append((account_id, ts, amount))
+        window.append(account_id, ts, amount, "retail", 12.9, None)
+
+    accounts = [f"acc-{i}" for i in range(50)] + ["unknown"]
+    stats = window.stats(accounts, now, timedelta(minutes=60))
+    for account_id in accounts:
+        count, total, std = expected_stats(rows, account_id, now, timedelta(minutes=60))
+        assert stats[account_id].count == count
+        assert stats[account_id].total == pytest.approx(total)
+        assert stats[account_id].std == pytest.approx(std, abs=1e-6)
+
+
+def test_ring_buffer_overwrites_oldest():
+    window = TransactionWindow(capacity=4, shards=1)
+    now = datetime(2024, 1, 1, 12, 0)
+    for i in range(6):
+        window.append("acc", now - timedelta(seconds=i), 10.0 * (i + 1))
+
+    stats = window.stats(["acc"], now, timedelta(hours=1))["acc"]
+    # Capacity 4: the last four writes survive
+    assert stats.count == 4
+    assert stats.total == pytest.approx(30 + 40 + 50 + 60)
+    assert window.memory_bytes() == 4 * 26
+
+
+def test_interned_tables_stay_bounded():
+    window = TransactionWindow(capacity=8, shards=1)
+    now = datetime(2024, 1, 1, 12, 0)
+    for i in range(1000):
+        window.append(f"acc-{i}", now, float(i), f"cat-{i}")
+
+    buffer = window.buffers[0]
+    assert len(buffer.accounts) <= 2 * 8
+    # Evicted accounts are gone, live ones keep their own entries after renumbering
+    stats = window.stats(["acc-0", "acc-999", "acc-992"], now, timedelta(hours=1))
+    assert stats["acc-0"].count == 0
+    assert stats["acc-999"].total == 999.0
+    assert stats["acc-992"].total == 992.0
+    live = {buffer.categories.values[code] for code in buffer.live()["category"].tolist()}
+    assert live <= {f"cat-{i}" for i in range(992, 1000)} | {OTHER_CATEGORY}
+
+
+def test_categories_overflow_to_other():
+    buffer = RingBuffer(capacity=8, max_categories=3)
+    for i in range(5):
+        buffer.append("acc", i, 1.0, f"cat-{i}", None, None)
+    # "other" plus two categories fit; the rest are all live, so they share "other"
+    assert buffer.categories.values == [OTHER_CATEGORY, "cat-0", "cat-1"]
+    assert buffer.live()["category"].tolist() == [1, 2, 0, 0, 0]
+
+
+def test_disabled_window_allocates_nothing():
+    window = TransactionWindow(capacity=0)
+    window.append("acc", datetime(2024, 1, 1), 10.0)
+    assert window.stats(["acc"], datetime(2024, 1, 1), timedelta(hours=1))["acc"].count == 0
+    assert window.memory_bytes() == 0